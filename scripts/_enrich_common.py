@@ -0,0 +1,271 @@
+"""
+Shared plumbing for the video enrichment scripts (enrich_video_states.py,
+enrich_video_tags.py): environment, the OpenAI client and its throttle,
+transient-error retries, the database connection, the response cache namespace,
+candidate claiming for parallel runs, the Batch API helpers, and the CLI flags
+both scripts accept.
+
+Not meant to be run directly.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+from typing import Optional, Dict, List, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import httpx
+from psycopg2 import pool
+from psycopg2.extras import RealDictCursor
+from dotenv import load_dotenv
+from openai import OpenAI, RateLimitError, APIConnectionError, APITimeoutError, InternalServerError
+
+from _rate_limiter import RateLimiter
+
+# Load environment variables
+load_dotenv()
+
+DATABASE_URL = os.getenv('DATABASE_URL')
+OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+
+# One keep-alive pool shared by all workers. Idle sockets outlive the rate
+# limiter's pauses (httpx drops them after 5s by default), so bursts after a
+# wait reuse warm TLS connections instead of handshaking again.
+OPENAI_HTTP = httpx.Client(
+    limits=httpx.Limits(max_connections=64, max_keepalive_connections=64, keepalive_expiry=60),
+    timeout=httpx.Timeout(600.0, connect=5.0),
+)
+openai_client = OpenAI(api_key=OPENAI_API_KEY, http_client=OPENAI_HTTP) if OPENAI_API_KEY else None
+
+# Proactive OpenAI throttle (gpt-4o-mini tier-1 limits) so parallel workers don't burn time on 429s
+OPENAI_RPM = 500
+OPENAI_TPM = 200000
+
+# Transient failures (429, 5xx, dropped connections) are retried here with
+# backoff instead of being counted as errors; anything else fails the video
+RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError)
+MAX_ATTEMPTS = 6
+MAX_BACKOFF_SECONDS = 30
+
+CHAT_MODEL = 'gpt-4o-mini'
+# Deterministic sampling, so a cached answer is the answer a rerun would get
+TEMPERATURE = 0
+
+# Buffer this many results before writing them in one transaction
+FLUSH_EVERY = 100
+# Batches being written at once, each on its own pooled connection
+FLUSH_WRITERS = 2
+
+# Other runs of the same job skip a claimed video until the claim is this old
+CLAIM_TIMEOUT_MINUTES = 60
+
+rpm_limiter = RateLimiter(OPENAI_RPM)
+tpm_limiter = RateLimiter(OPENAI_TPM)
+
+
+# Connection pool (the main thread reads candidates and the cache, writer
+# threads flush result batches on their own connections)
+db_pool = None
+
+
+def init_db_pool(min_conn=1, max_conn=FLUSH_WRITERS + 1):
+    """Initialize database connection pool, retrying while the database is unreachable."""
+    global db_pool
+    for attempt in range(3):
+        try:
+            db_pool = pool.ThreadedConnectionPool(min_conn, max_conn, DATABASE_URL, cursor_factory=RealDictCursor)
+            return
+        except Exception as e:
+            if attempt < 2:
+                time.sleep(1)
+            else:
+                raise e
+
+
+def get_db_connection():
+    """Get a connection from the pool."""
+    return db_pool.getconn()
+
+
+def return_db_connection(conn):
+    """Return a connection to the pool."""
+    db_pool.putconn(conn)
+
+
+def close_db_pool():
+    """Close every pooled connection."""
+    db_pool.closeall()
+
+
+def submit_flush(writer: ThreadPoolExecutor, flush, pending: List[tuple]) -> Future:
+    """Hand the buffered rows to a writer thread and empty the buffer.
+
+    The writer runs flush(conn, rows) on its own pooled connection, so the main
+    thread keeps consuming AI results while the batch is written.
+    """
+    rows = list(pending)
+    pending.clear()
+
+    def write():
+        conn = get_db_connection()
+        try:
+            flush(conn, rows)
+        finally:
+            return_db_connection(conn)
+
+    return writer.submit(write)
+
+
+def add_common_arguments(parser):
+    """CLI flags shared by the video enrichers (each script adds its own --all)."""
+    parser.add_argument('--dry-run', action='store_true', help='Preview without making changes')
+    parser.add_argument('--limit', type=int, default=0, help='Limit number of records to process')
+    parser.add_argument('--workers', type=int, default=5, help='Number of parallel AI workers')
+    parser.add_argument('--batch', action='store_true',
+                        help='Submit AI analyses to the OpenAI Batch API (half price, results within 24h)')
+    parser.add_argument('--collect-batch', metavar='BATCH_ID', help='Write the results of a finished --batch job')
+    parser.add_argument('--no-cache', action='store_true', help='Skip the response cache (no lookups, no writes)')
+
+
+def cache_kind(name: str, system_prompt: str) -> str:
+    """Cache namespace for one script's answers.
+
+    Scoped to the model, temperature and system prompt that produced them, so a
+    prompt edit starts a fresh cache instead of reusing stale answers.
+    """
+    fingerprint = hashlib.sha256(f"{CHAT_MODEL}|{TEMPERATURE}|{system_prompt}".encode('utf-8')).hexdigest()
+    return f"{name}:{fingerprint[:12]}"
+
+
+def candidate_query(job: str, columns: str, where: str, limit: int, claim: bool) -> Tuple[str, Optional[tuple]]:
+    """Query (and params) selecting the videos a run should process, newest first.
+
+    With claim=True the rows are also claimed for `job`, so several runs can
+    work in parallel on disjoint sets: FOR UPDATE SKIP LOCKED passes over rows
+    another run is claiming right now, and rows with a claim younger than
+    CLAIM_TIMEOUT_MINUTES are left out. The caller must commit to keep the claim.
+    """
+    limit_sql = f"LIMIT {limit}" if limit > 0 else ""
+    if not claim:
+        return f"""
+            SELECT {columns} FROM marketing_content
+            WHERE {where}
+            ORDER BY last_updated DESC
+            {limit_sql}
+        """, None
+
+    return f"""
+        WITH candidates AS (
+            SELECT id FROM marketing_content m
+            WHERE {where}
+              AND NOT EXISTS (
+                  SELECT 1 FROM content_enrichment_claims c
+                  WHERE c.content_id = m.id AND c.job = %s
+                    AND c.claimed_at > NOW() - %s * INTERVAL '1 minute'
+              )
+            ORDER BY last_updated DESC
+            {limit_sql}
+            FOR UPDATE SKIP LOCKED
+        ), claimed AS (
+            INSERT INTO content_enrichment_claims (content_id, job)
+            SELECT id, %s FROM candidates
+            ON CONFLICT (content_id, job) DO UPDATE SET claimed_at = NOW()
+            RETURNING content_id
+        )
+        SELECT {columns} FROM marketing_content
+        WHERE id IN (SELECT content_id FROM claimed)
+        ORDER BY last_updated DESC
+    """, (job, CLAIM_TIMEOUT_MINUTES, job)
+
+
+def release_claims(conn, job: str, content_ids: List):
+    """Drop this run's claims for `job`, and any expired ones.
+
+    Called when a run ends, whether or not it succeeded, so videos it didn't
+    finish are visible to the next run right away instead of after
+    CLAIM_TIMEOUT_MINUTES, and the claims table doesn't keep growing.
+    """
+    # The run may have ended on a failed statement
+    conn.rollback()
+    with conn.cursor() as cur:
+        cur.execute("""
+            DELETE FROM content_enrichment_claims
+            WHERE job = %s
+              AND (content_id = ANY(%s::uuid[]) OR claimed_at <= NOW() - %s * INTERVAL '1 minute')
+        """, (job, [str(content_id) for content_id in content_ids], CLAIM_TIMEOUT_MINUTES))
+    conn.commit()
+
+
+def retry_delay(error: Exception, attempt: int) -> float:
+    """Seconds to wait before the next attempt: the server's Retry-After, else jittered backoff."""
+    response = getattr(error, 'response', None)
+    retry_after = response.headers.get('retry-after') if response is not None else None
+    try:
+        return min(float(retry_after), MAX_BACKOFF_SECONDS)
+    except (TypeError, ValueError):
+        # Full jitter keeps parallel workers from retrying in lockstep
+        return random.uniform(0, min(MAX_BACKOFF_SECONDS, 2 ** attempt))
+
+
+def create_chat_completion(**kwargs):
+    """Call chat.completions.create once the RPM/TPM buckets allow it, retrying transient errors."""
+    prompt_chars = sum(len(m['content']) for m in kwargs['messages'])
+    # Retries happen here so they go back through the rate limiter
+    client = openai_client.with_options(max_retries=0)
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        rpm_limiter.acquire()
+        tpm_limiter.acquire(prompt_chars // 4 + kwargs.get('max_tokens', 0))
+        try:
+            return client.chat.completions.create(**kwargs)
+        except RETRYABLE_ERRORS as e:
+            if attempt == MAX_ATTEMPTS:
+                raise
+            time.sleep(retry_delay(e, attempt))
+
+
+def submit_batch_requests(batch_requests: Dict[str, Dict], name: str) -> str:
+    """Upload one JSONL line per request and start a 24h Batch API job; returns its id."""
+    lines = [
+        json.dumps({"custom_id": custom_id, "method": "POST", "url": "/v1/chat/completions", "body": body})
+        for custom_id, body in batch_requests.items()
+    ]
+    batch_file = openai_client.files.create(file=(f"{name}.jsonl", "\n".join(lines).encode()), purpose="batch")
+    batch = openai_client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+    return batch.id
+
+
+def fetch_batch_results(batch_id: str) -> Dict[str, Dict]:
+    """Parsed JSON replies by custom_id for a completed batch.
+
+    Exits if the batch is still running; failed requests come back as
+    {'error': ...} so they are counted like live API errors.
+    """
+    batch = openai_client.batches.retrieve(batch_id)
+    if batch.status != "completed":
+        counts = batch.request_counts
+        progress = f" ({counts.completed}/{counts.total} done)" if counts else ""
+        print(f"Batch {batch_id} is {batch.status}{progress}; nothing to collect yet")
+        sys.exit(0 if batch.status in ("validating", "in_progress", "finalizing") else 1)
+
+    results = {}
+    output_ids = [file_id for file_id in (batch.output_file_id, batch.error_file_id) if file_id]
+    for file_id in output_ids:
+        for line in openai_client.files.content(file_id).text.splitlines():
+            record = json.loads(line)
+            response = record.get("response") or {}
+            if response.get("status_code") != 200:
+                error = record.get("error") or response.get("body", {}).get("error") or {}
+                results[record["custom_id"]] = {'error': error.get("message", "Batch request failed")}
+                continue
+            try:
+                results[record["custom_id"]] = json.loads(response["body"]["choices"][0]["message"]["content"])
+            except (KeyError, IndexError, json.JSONDecodeError) as e:
+                results[record["custom_id"]] = {'error': f"Could not parse batch response: {e}"}
+    return results
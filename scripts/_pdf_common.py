@@ -0,0 +1,279 @@
+"""
+Shared plumbing for the PDF enrichment scripts (enrich_pdf_text.py,
+enrich_hubspot_pdfs.py): the database and PDF parsing pools, PDF download and
+text extraction (once per URL per run), the AI response cache, and the
+throttled OpenAI call.
+
+DATABASE_URL and OPENAI_API_KEY are read when first needed rather than at
+import, so each script's own .env loading applies.
+
+Not meant to be run directly.
+"""
+
+import os
+import json
+import time
+import random
+import hashlib
+import functools
+import threading
+from typing import Optional, Dict, Tuple
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from psycopg2 import pool
+from psycopg2.extras import RealDictCursor, Json
+
+from _rate_limiter import RateLimiter
+
+# Proactive OpenAI throttle (gpt-4o-mini tier-1 limits) so parallel workers don't burn time on 429s
+OPENAI_RPM = 500
+OPENAI_TPM = 200000
+OPENAI_MAX_ATTEMPTS = 6
+
+# Only the first 15 pages / 8000 chars are used, so don't pull whole ebooks
+MAX_PDF_BYTES = 8 * 1024 * 1024
+
+_NUL_TABLE = {0: None}  # str.translate table that drops NUL bytes
+
+# Shared HTTP session so PDF downloads from the same CDN reuse keep-alive connections
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=16, pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504]),
+))
+_SESSION.headers.update({
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+})
+
+rpm_limiter = RateLimiter(OPENAI_RPM)
+tpm_limiter = RateLimiter(OPENAI_TPM)
+
+
+# Connection pool (main thread writes results, workers read/write the AI cache)
+db_pool = None
+
+# Process pool for CPU-bound PDF parsing (created in main)
+parse_pool = None
+
+# Extracted text per (url, max_chars) for this run; duplicate links share one download
+_url_cache: Dict[Tuple[str, int], Future] = {}
+_url_cache_lock = threading.Lock()
+
+
+def init_db_pool(min_conn=1, max_conn=10):
+    """Initialize database connection pool."""
+    global db_pool
+    db_pool = pool.ThreadedConnectionPool(min_conn, max_conn, os.getenv('DATABASE_URL'),
+                                          cursor_factory=RealDictCursor)
+
+
+def get_db_connection():
+    """Get a connection from the pool."""
+    return db_pool.getconn()
+
+
+def return_db_connection(conn, close: bool = False):
+    """Return a connection to the pool (close=True discards it instead of keeping it open)."""
+    db_pool.putconn(conn, close=close)
+
+
+def close_db_pool():
+    """Close every pooled connection."""
+    db_pool.closeall()
+
+
+def init_parse_pool(max_workers: Optional[int] = None):
+    """Initialize the PDF parsing process pool (defaults to one process per core)."""
+    global parse_pool
+    parse_pool = ProcessPoolExecutor(max_workers=max_workers or os.cpu_count())
+
+
+def shutdown_parse_pool():
+    """Stop the PDF parsing processes, if the pool was started."""
+    if parse_pool:
+        parse_pool.shutdown()
+
+
+@functools.cache
+def _get_encoder():
+    """tiktoken encoder for gpt-4o-mini, loaded on first use."""
+    import tiktoken
+    return tiktoken.encoding_for_model("gpt-4o-mini")
+
+
+@functools.cache
+def get_openai_client():
+    """Shared OpenAI client, created on first use so --dry-run never imports openai."""
+    from openai import OpenAI
+    return OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+
+
+def prompt_hash(model: str, messages: list) -> str:
+    """Stable cache key for an exact chat request."""
+    payload = json.dumps({'model': model, 'messages': messages}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def get_cached_response(key: str) -> Optional[Dict]:
+    """Look up a previously stored AI response by prompt hash."""
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT response FROM content_tags_cache WHERE prompt_hash = %s", (key,))
+            row = cur.fetchone()
+        conn.commit()
+        return row['response'] if row else None
+    finally:
+        return_db_connection(conn)
+
+
+def store_cached_response(key: str, model: str, response: Dict):
+    """Save an AI response so identical prompts are free on the next run."""
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO content_tags_cache (prompt_hash, model, response)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (prompt_hash) DO NOTHING
+            """, (key, model, Json(response)))
+        conn.commit()
+    finally:
+        return_db_connection(conn)
+
+
+def download_pdf(url: str) -> bytes:
+    """Stream a PDF, stopping after MAX_PDF_BYTES (only the first pages are used)."""
+    headers = {'Range': f'bytes=0-{MAX_PDF_BYTES - 1}'}  # Most CDNs honor this; others just send it all
+    with _SESSION.get(url, timeout=30, stream=True, headers=headers) as response:
+        response.raise_for_status()
+        # Login walls and 404 pages come back as HTML; bail before reading the body
+        content_type = response.headers.get('Content-Type', '')
+        if content_type.startswith('text/html'):
+            raise ValueError(f"not a PDF (Content-Type: {content_type})")
+
+        buf = bytearray()
+        for chunk in response.iter_content(65536):
+            if not buf and not chunk.startswith(b'%PDF'):
+                raise ValueError("not a PDF (missing %PDF header)")
+            buf += chunk
+            if len(buf) >= MAX_PDF_BYTES:
+                break
+    return bytes(buf[:MAX_PDF_BYTES])
+
+
+def _parse_pdf_bytes(pdf_bytes: bytes, max_chars: int, verbose: bool = False) -> Tuple[str, int]:
+    """Extract raw text from the first 15 pages of a PDF.
+
+    Top-level and picklable so it can run in the parse process pool; PyMuPDF
+    holds the GIL while parsing, so threads alone would serialize it.
+    """
+    import fitz  # PyMuPDF
+
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        text_parts = []
+        total_chars = 0
+
+        for page in doc.pages(0, min(15, doc.page_count)):  # Max 15 pages
+            try:
+                # Pages with no fonts (scans, full-bleed images) have no text layer
+                if not page.get_fonts(full=False):
+                    continue
+                # Collapse whitespace per page so the joined text never needs a second pass
+                page_text = " ".join(page.get_text("text").split())
+                if not page_text:
+                    continue
+                text_parts.append(page_text)
+                total_chars += len(page_text)
+
+                if total_chars >= max_chars:
+                    break
+            except Exception as e:
+                if verbose:
+                    print(f"    Warning: Could not extract page {page.number + 1}: {e}")
+                continue
+
+        return " ".join(text_parts), doc.page_count
+    finally:
+        doc.close()
+
+
+def _extract_pdf_text(url: str, max_chars: int = 8000, verbose: bool = False) -> str:
+    """Download a PDF from URL and extract text via PyMuPDF ("" if that fails)."""
+    try:
+        if verbose:
+            print(f"    Downloading PDF from {url[:80]}...")
+
+        pdf_bytes = download_pdf(url)
+
+        if parse_pool:
+            full_text, page_count = parse_pool.submit(_parse_pdf_bytes, pdf_bytes, max_chars, verbose).result()
+        else:
+            full_text, page_count = _parse_pdf_bytes(pdf_bytes, max_chars, verbose)
+
+        # Strip NUL bytes (Postgres TEXT rejects them); whitespace was collapsed per page
+        full_text = full_text.translate(_NUL_TABLE)
+
+        if verbose:
+            print(f"    Extracted {len(full_text)} chars from {page_count} pages")
+
+        return full_text[:max_chars]
+
+    except Exception as e:
+        print(f"    ERROR extracting PDF {url[:60]}: {e}")
+        return ""
+
+
+def extract_pdf_text(url: str, max_chars: int = 8000, verbose: bool = False) -> str:
+    """Extract text from a PDF URL, at most once per URL per run.
+
+    Concurrent calls for a URL that is already being fetched wait for that
+    download instead of starting another.
+    """
+    key = (url, max_chars)
+    with _url_cache_lock:
+        future = _url_cache.get(key)
+        is_owner = future is None
+        if is_owner:
+            future = _url_cache[key] = Future()
+
+    if is_owner:
+        # _extract_pdf_text reports its own errors, but anything that still
+        # escapes (KeyboardInterrupt included) must reach the waiters too
+        try:
+            future.set_result(_extract_pdf_text(url, max_chars, verbose))
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+    return future.result()
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to at most max_tokens gpt-4o-mini tokens."""
+    enc = _get_encoder()
+    tokens = enc.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return enc.decode(tokens[:max_tokens])
+
+
+def create_chat_completion(**kwargs):
+    """Call chat.completions.create under the RPM/TPM limits, retrying on 429s."""
+    from openai import RateLimitError
+
+    prompt_chars = sum(len(m['content']) for m in kwargs['messages'])
+    estimated_tokens = prompt_chars // 4 + kwargs.get('max_tokens', 0)
+
+    for attempt in range(OPENAI_MAX_ATTEMPTS):
+        rpm_limiter.acquire()
+        tpm_limiter.acquire(estimated_tokens)
+        try:
+            return get_openai_client().chat.completions.create(**kwargs)
+        except RateLimitError:
+            if attempt == OPENAI_MAX_ATTEMPTS - 1:
+                raise
+            time.sleep(random.uniform(1, min(60, 2 ** (attempt + 1))))
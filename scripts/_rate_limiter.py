@@ -0,0 +1,33 @@
+"""
+Token-bucket rate limiter shared by the scripts that call OpenAI from parallel
+workers (_enrich_common.py, _pdf_common.py, import_google_drive.py).
+
+Not meant to be run directly.
+"""
+
+import time
+import threading
+
+
+class RateLimiter:
+    """Thread-safe token bucket refilled continuously over one minute."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = per_minute
+        self.available = float(per_minute)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, amount: int = 1):
+        """Block until `amount` units are available, then consume them."""
+        amount = min(amount, self.capacity)
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.available = min(self.capacity, self.available + (now - self.updated) * self.capacity / 60)
+                self.updated = now
+                if self.available >= amount:
+                    self.available -= amount
+                    return
+                wait = (amount - self.available) * 60 / self.capacity
+            time.sleep(wait)
@@ -7,27 +7,31 @@ This script:
 2. Downloads and extracts text from each PDF
 3. Uses OpenAI to generate relevant tags and enhanced summaries
 4. Updates the database with the enriched data
+
+Downloads and AI calls run in parallel worker threads (--workers, default 5).
+With --batch, AI calls go through the OpenAI Batch API instead: text is
+extracted first, then all uncached prompts are submitted as one batch job at
+half the per-token price, and results are written once the batch completes.
 """
 
 import os
 import sys
-import io
-import re
+import json
 import time
-import requests
+import argparse
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import execute_values
 from dotenv import load_dotenv
-from openai import OpenAI
-from datetime import datetime
+from datetime import datetime, timezone
+from typing import Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-# PDF extraction
-try:
-    import PyPDF2
-except ImportError:
-    print("Installing PyPDF2...")
-    os.system('pip install PyPDF2')
-    import PyPDF2
+from _pdf_common import (
+    init_db_pool, get_db_connection, return_db_connection, close_db_pool,
+    init_parse_pool, shutdown_parse_pool, get_openai_client,
+    prompt_hash, get_cached_response, store_cached_response,
+    extract_pdf_text, truncate_tokens, create_chat_completion,
+)
 
 # Load environment variables
 load_dotenv()
@@ -35,70 +39,32 @@ load_dotenv()
 DATABASE_URL = os.getenv('DATABASE_URL')
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 
-if not OPENAI_API_KEY:
-    print("ERROR: OPENAI_API_KEY not set in environment")
-    sys.exit(1)
-
-openai_client = OpenAI(api_key=OPENAI_API_KEY)
+# Buffer this many finished records before writing them in one transaction
+FLUSH_EVERY = 32
 
+# How often to check on a --batch job
+BATCH_POLL_SECONDS = 60
 
-def get_db_connection():
-    """Create database connection."""
-    return psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor)
+# Extracted text sent to the model is capped by tokens so prompt size is fixed
+PROMPT_TEXT_TOKENS = 3500
 
 
-def extract_pdf_text(url: str, max_chars: int = 8000) -> str:
-    """Download and extract text from a PDF URL."""
+def require_pymupdf():
+    """Install PyMuPDF if missing; it is only imported where PDFs are parsed."""
     try:
-        print(f"    Downloading PDF...")
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-
-        pdf_file = io.BytesIO(response.content)
-        reader = PyPDF2.PdfReader(pdf_file)
-
-        text_parts = []
-        total_chars = 0
-
-        for i, page in enumerate(reader.pages[:15]):  # Max 15 pages
-            try:
-                page_text = page.extract_text() or ""
-                text_parts.append(page_text)
-                total_chars += len(page_text)
-
-                if total_chars >= max_chars:
-                    break
-            except Exception as e:
-                print(f"    Warning: Could not extract page {i+1}: {e}")
-                continue
-
-        full_text = "\n".join(text_parts)
-
-        # Clean up the text
-        full_text = re.sub(r'\s+', ' ', full_text)
-        full_text = full_text.strip()
-
-        print(f"    Extracted {len(full_text)} characters from {len(reader.pages)} pages")
-        return full_text[:max_chars]
-
-    except Exception as e:
-        print(f"    ERROR extracting PDF: {e}")
-        return ""
-
+        import fitz  # noqa: F401
+    except ImportError:
+        print("Installing PyMuPDF...")
+        os.system('pip install PyMuPDF')
 
-def generate_tags_and_summary(title: str, content_type: str, text: str) -> dict:
-    """Use OpenAI to generate relevant tags and an enhanced summary."""
 
-    prompt = f"""Analyze this SchooLinks marketing PDF content and generate:
+# Static instructions live in the system message so every request shares the
+# same prefix (eligible for OpenAI's automatic prompt caching); only the
+# per-PDF fields go in the user message.
+SYSTEM_PROMPT = """Analyze SchooLinks marketing PDF content and generate:
 1. Relevant keyword tags (5-10 tags)
 2. A concise 2-3 sentence summary optimized for search
 
-PDF Title: {title}
-Content Type: {content_type}
-
-Extracted Text:
-{text[:6000]}
-
 Generate tags from these categories (only include tags that are ACTUALLY mentioned or clearly relevant):
 
 **Personas/Audiences:**
@@ -123,96 +89,214 @@ Generate tags from these categories (only include tags that are ACTUALLY mention
 - family portal, intermediary accounts, credential wallet
 
 Respond with valid JSON only:
-{{
+{
   "tags": ["tag1", "tag2", "tag3", ...],
   "summary": "A concise 2-3 sentence summary of this content piece."
-}}"""
+}"""
+
+
+def build_request(title: str, content_type: str, text: str) -> dict:
+    """Chat completion parameters for one PDF (shared by the live and Batch API paths)."""
+    prompt = f"""PDF Title: {title}
+Content Type: {content_type}
+
+Extracted Text:
+{truncate_tokens(text, PROMPT_TEXT_TOKENS)}"""
+
+    return {
+        "model": "gpt-4o-mini",
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        "temperature": 0.2,
+        "max_tokens": 500,
+        "response_format": {"type": "json_object"},
+    }
+
+
+def generate_tags_and_summary(title: str, content_type: str, text: str, use_cache: bool = True,
+                              defer: bool = False) -> Optional[dict]:
+    """Use OpenAI to generate relevant tags and an enhanced summary.
+
+    With defer=True, only the cache is consulted; a miss returns None so the
+    caller can submit the request through the Batch API instead.
+    """
+    request = build_request(title, content_type, text)
+    cache_key = prompt_hash(request["model"], request["messages"])
 
     try:
-        response = openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.2,
-            max_tokens=500
-        )
-
-        content = response.choices[0].message.content.strip()
-
-        # Parse JSON response
-        json_match = re.search(r'\{[\s\S]*\}', content)
-        if json_match:
-            import json
-            result = json.loads(json_match.group())
-            return {
-                "tags": result.get("tags", []),
-                "summary": result.get("summary", "")
-            }
+        result = get_cached_response(cache_key) if use_cache else None
 
-        return {"tags": [], "summary": ""}
+        if not result:
+            if defer:
+                return None
+
+            response = create_chat_completion(**request)
+
+            result = json.loads(response.choices[0].message.content)
+            if result:
+                store_cached_response(cache_key, request["model"], result)
+
+        return {
+            "tags": result.get("tags", []),
+            "summary": result.get("summary", "")
+        }
 
     except Exception as e:
         print(f"    ERROR generating tags: {e}")
         return {"tags": [], "summary": ""}
 
 
-def enrich_content(conn, content_id: str, title: str, content_type: str, url: str):
-    """Enrich a single content item with extracted text, tags, and summary."""
-
-    print(f"\n  Processing: {title}")
+def enrich_content(content_id: str, title: str, content_type: str, url: str,
+                   use_cache: bool = True, defer_ai: bool = False) -> dict:
+    """Extract text, tags, and summary for a single content item.
 
+    Runs in a worker thread and only does network work; the caller writes the
+    returned result to the database. With defer_ai=True, cache misses come back
+    with "deferred" set and no tags, to be filled in by run_batch().
+    """
     # Step 1: Extract text from PDF
     extracted_text = extract_pdf_text(url)
 
     if not extracted_text:
-        # Update with error
-        cur = conn.cursor()
-        cur.execute("""
-            UPDATE marketing_content
-            SET extraction_error = 'Could not extract text from PDF',
-                content_analyzed_at = NOW()
-            WHERE id = %s
-        """, (content_id,))
-        conn.commit()
-        print("    Skipped - could not extract text")
-        return False
+        return {"id": content_id, "extracted_text": "", "tags": [], "summary": ""}
 
     # Step 2: Generate tags and summary with AI
-    print("    Generating tags and summary with AI...")
-    result = generate_tags_and_summary(title, content_type, extracted_text)
+    result = generate_tags_and_summary(title, content_type, extracted_text, use_cache=use_cache, defer=defer_ai)
+
+    if result is None:
+        return {"id": content_id, "extracted_text": extracted_text, "tags": [], "summary": "", "deferred": True}
+
+    return {
+        "id": content_id,
+        "extracted_text": extracted_text,
+        "tags": result.get("tags", []),
+        "summary": result.get("summary", ""),
+    }
+
+
+def run_batch(requests_by_id: dict) -> dict:
+    """Run chat completions through the OpenAI Batch API.
+
+    Uploads one JSONL line per request, blocks until the batch finishes (24h
+    completion window, polled every BATCH_POLL_SECONDS), and returns the parsed
+    JSON responses keyed by custom_id. Requests that failed are left out.
+    """
+    client = get_openai_client()
+
+    lines = [
+        json.dumps({"custom_id": custom_id, "method": "POST", "url": "/v1/chat/completions", "body": body})
+        for custom_id, body in requests_by_id.items()
+    ]
+    batch_file = client.files.create(file=("hubspot_pdfs.jsonl", "\n".join(lines).encode()), purpose="batch")
+    batch = client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+    print(f"\nSubmitted batch {batch.id} with {len(lines)} requests")
+
+    while batch.status not in ("completed", "failed", "expired", "cancelled"):
+        time.sleep(BATCH_POLL_SECONDS)
+        batch = client.batches.retrieve(batch.id)
+        counts = batch.request_counts
+        if counts:
+            print(f"  Batch {batch.status}: {counts.completed}/{counts.total} done, {counts.failed} failed")
+
+    if batch.status != "completed" or not batch.output_file_id:
+        print(f"  ERROR: Batch {batch.id} ended with status '{batch.status}'")
+        return {}
+
+    results = {}
+    for line in client.files.content(batch.output_file_id).text.splitlines():
+        record = json.loads(line)
+        response = record.get("response") or {}
+        if response.get("status_code") != 200:
+            continue
+        try:
+            results[record["custom_id"]] = json.loads(response["body"]["choices"][0]["message"]["content"])
+        except (KeyError, IndexError, json.JSONDecodeError):
+            continue
+
+    return results
 
-    tags = result.get("tags", [])
-    summary = result.get("summary", "")
 
-    # Format tags as comma-separated string
+def report_enrichment(result: dict) -> bool:
+    """Print the outcome of one enrichment and return whether it succeeded."""
+    if not result["extracted_text"]:
+        print("    Skipped - could not extract text")
+        return False
+
+    tags = result["tags"]
+    summary = result["summary"]
     tags_str = ", ".join(tags) if tags else ""
 
+    print(f"    Extracted {len(result['extracted_text'])} characters")
     print(f"    Generated {len(tags)} tags: {tags_str[:80]}{'...' if len(tags_str) > 80 else ''}")
     print(f"    Summary: {summary[:100]}{'...' if len(summary) > 100 else ''}")
+    return True
 
-    # Step 3: Update database
-    cur = conn.cursor()
-    cur.execute("""
-        UPDATE marketing_content
-        SET extracted_text = %s,
-            auto_tags = %s,
-            enhanced_summary = %s,
-            content_analyzed_at = NOW(),
-            extraction_error = NULL
-        WHERE id = %s
-    """, (extracted_text[:5000], tags_str, summary, content_id))
-    conn.commit()
 
-    print("    ✓ Updated database")
-    return True
+def flush_results(conn, pending: list):
+    """Write buffered enrichment results with one statement per outcome and a single commit."""
+    # One client-side timestamp per batch instead of per-row NOW()
+    analyzed_at = datetime.now(timezone.utc)
+    enriched = [
+        # Format tags as comma-separated string
+        (r["id"], r["extracted_text"][:5000], ", ".join(r["tags"]) if r["tags"] else "", r["summary"],
+         analyzed_at)
+        for r in pending if r["extracted_text"]
+    ]
+    failed = [(r["id"], analyzed_at) for r in pending if not r["extracted_text"]]
+
+    with conn.cursor() as cur:
+        if enriched:
+            execute_values(cur, """
+                UPDATE marketing_content AS m
+                SET extracted_text = v.extracted_text,
+                    auto_tags = v.auto_tags,
+                    enhanced_summary = v.enhanced_summary,
+                    content_analyzed_at = v.analyzed_at,
+                    extraction_error = NULL
+                FROM (VALUES %s) AS v(id, extracted_text, auto_tags, enhanced_summary, analyzed_at)
+                WHERE m.id = v.id::uuid
+            """, enriched, template="(%s, %s, %s, %s, %s)")
+
+        if failed:
+            execute_values(cur, """
+                UPDATE marketing_content AS m
+                SET extraction_error = 'Could not extract text from PDF',
+                    content_analyzed_at = v.analyzed_at
+                FROM (VALUES %s) AS v(id, analyzed_at)
+                WHERE m.id = v.id::uuid
+            """, failed)
+
+    conn.commit()
+    print(f"\n    ✓ Saved {len(pending)} records to database")
+    pending.clear()
 
 
 def main():
+    parser = argparse.ArgumentParser(description='Enrich HubSpot PDFs with AI tags and summaries')
+    parser.add_argument('--workers', type=int, default=5, help='Number of parallel download/AI workers')
+    parser.add_argument('--no-cache', action='store_true', help='Ignore cached AI responses (still refreshes the cache)')
+    parser.add_argument('--batch', action='store_true',
+                        help='Send AI requests through the OpenAI Batch API (half price, waits up to 24h)')
+    args = parser.parse_args()
+
     print("=" * 60)
     print("HubSpot PDF Enrichment")
     print("=" * 60)
 
+    if not OPENAI_API_KEY:
+        print("ERROR: OPENAI_API_KEY not set in environment")
+        sys.exit(1)
+
+    init_db_pool(max_conn=args.workers + 2)
     conn = get_db_connection()
-    cur = conn.cursor()
+    # Plain tuple cursor for the list query; rows are unpacked positionally
+    cur = conn.cursor(cursor_factory=psycopg2.extensions.cursor)
 
     # Find HubSpot PDFs needing enrichment
     cur.execute("""
@@ -230,32 +314,101 @@ def main():
 
     if not items:
         print("\nNo HubSpot PDFs need enrichment. All done!")
+        return_db_connection(conn)
+        close_db_pool()
         return
 
     print(f"\nFound {len(items)} PDFs to enrich:\n")
-    for item in items:
-        print(f"  - {item['title'][:50]} ({item['type']})")
+    for _, title, content_type, _ in items:
+        print(f"  - {title[:50]} ({content_type})")
 
-    print(f"\nStarting enrichment...")
+    print(f"\nStarting enrichment with {args.workers} workers...")
 
     success = 0
     failed = 0
+    pending = []
+    deferred = {}
+
+    require_pymupdf()
+    init_parse_pool()
+    get_openai_client()  # Build the one shared client before workers race to create it
+
+    # Downloads and AI calls run in worker threads; this thread batches the DB writes
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = {
+            executor.submit(
+                enrich_content, content_id, title, content_type, url, not args.no_cache, args.batch
+            ): (title, content_type)
+            for content_id, title, content_type, url in items
+        }
+
+        for i, future in enumerate(as_completed(futures), 1):
+            title, content_type = futures[future]
+            print(f"\n[{i}/{len(items)}] {title}")
 
-    for i, item in enumerate(items):
-        print(f"\n[{i+1}/{len(items)}]")
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"    ERROR: {e}")
+                failed += 1
+                continue
 
-        try:
-            if enrich_content(conn, item['id'], item['title'], item['type'], item['ungated_link']):
+            if result.get("deferred"):
+                print(f"    Extracted {len(result['extracted_text'])} characters (queued for batch)")
+                deferred[result["id"]] = (result, title, content_type)
+                continue
+
+            if report_enrichment(result):
                 success += 1
             else:
                 failed += 1
-        except Exception as e:
-            print(f"    ERROR: {e}")
-            failed += 1
-
-        # Rate limit
-        if i < len(items) - 1:
-            time.sleep(0.5)
+            pending.append(result)
+
+            if len(pending) >= FLUSH_EVERY:
+                flush_results(conn, pending)
+
+    shutdown_parse_pool()
+
+    if deferred:
+        if pending:
+            flush_results(conn, pending)
+
+        requests_by_id = {
+            content_id: build_request(title, content_type, result["extracted_text"])
+            for content_id, (result, title, content_type) in deferred.items()
+        }
+        # The batch can take hours; don't hold an idle connection open across it
+        return_db_connection(conn, close=True)
+        batch_results = run_batch(requests_by_id)
+        conn = get_db_connection()
+
+        if not batch_results:
+            # Leave these rows untouched so the next run picks them up again
+            print(f"    Batch produced no results; {len(deferred)} PDFs left for the next run")
+            failed += len(deferred)
+        else:
+            for content_id, (result, title, _) in deferred.items():
+                print(f"\n{title}")
+                ai_result = batch_results.get(content_id)
+                if ai_result:
+                    request = requests_by_id[content_id]
+                    store_cached_response(prompt_hash(request["model"], request["messages"]), request["model"], ai_result)
+                    result["tags"] = ai_result.get("tags", [])
+                    result["summary"] = ai_result.get("summary", "")
+                else:
+                    print("    ERROR generating tags: batch request failed")
+
+                if report_enrichment(result):
+                    success += 1
+                else:
+                    failed += 1
+                pending.append(result)
+
+                if len(pending) >= FLUSH_EVERY:
+                    flush_results(conn, pending)
+
+    if pending:
+        flush_results(conn, pending)
 
     print("\n" + "=" * 60)
     print("Enrichment Complete")
@@ -263,7 +416,8 @@ def main():
     print(f"Successfully enriched: {success}")
     print(f"Failed: {failed}")
 
-    conn.close()
+    return_db_connection(conn)
+    close_db_pool()
 
 
 if __name__ == '__main__':
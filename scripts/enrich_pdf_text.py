@@ -4,7 +4,7 @@ PDF Text Extraction & Re-Enrichment Script
 
 Fixes ebooks and 1-pagers whose extracted_text contains Webflow resource page
 wrapper text instead of actual PDF content. Downloads the PDF from ungated_link,
-extracts real text via PyPDF2, and optionally re-runs AI enrichment.
+extracts real text via PyMuPDF, and optionally re-runs AI enrichment.
 
 Usage:
     python scripts/enrich_pdf_text.py --dry-run -v      # Preview what would be processed
@@ -12,29 +12,27 @@ Usage:
     python scripts/enrich_pdf_text.py --re-enrich        # Extract + AI re-analysis
     python scripts/enrich_pdf_text.py --limit 5 -v       # Test with 5 records
     python scripts/enrich_pdf_text.py --force             # Re-extract all PDFs (not just bad ones)
+    python scripts/enrich_pdf_text.py --workers 10        # Download/analyze 10 PDFs at a time
 """
 
 import os
 import sys
-import io
-import re
 import json
-import time
 import argparse
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional, Dict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import execute_values
 from dotenv import load_dotenv
-import requests
 
-# PDF extraction
-try:
-    import PyPDF2
-except ImportError:
-    print("ERROR: PyPDF2 not installed. Run: pip install PyPDF2")
-    sys.exit(1)
+from _pdf_common import (
+    init_db_pool, get_db_connection, return_db_connection, close_db_pool,
+    init_parse_pool, shutdown_parse_pool, get_openai_client,
+    prompt_hash, get_cached_response, store_cached_response,
+    extract_pdf_text, truncate_tokens, create_chat_completion,
+)
 
 # Load environment variables from multiple locations
 for env_path in ['.env', '.env.local', 'scripts/.env', 'frontend/.env']:
@@ -43,6 +41,8 @@ for env_path in ['.env', '.env.local', 'scripts/.env', 'frontend/.env']:
 DATABASE_URL = os.getenv('DATABASE_URL')
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 
+PDF_CONTENT_TYPES = ['Ebook', '1-Pager']
+
 # Webflow wrapper patterns that indicate extracted_text is from the resource page, not the PDF
 WRAPPER_PATTERNS = [
     'All Resources%Case Study%',
@@ -52,78 +52,33 @@ WRAPPER_PATTERNS = [
     'All Resources%eBook%SchooLinks Staff%',
 ]
 
+# Buffer this many finished records before writing them in one transaction
+FLUSH_EVERY = 32
 
-def get_db_connection():
-    """Create database connection."""
-    return psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor)
+# Extracted text sent to the model is capped by tokens so prompt size is fixed
+PROMPT_TEXT_TOKENS = 3500
 
 
-def extract_pdf_text(url: str, max_chars: int = 8000, verbose: bool = False) -> Optional[str]:
-    """Download a PDF from URL and extract text via PyPDF2."""
+def require_pymupdf():
+    """Fail fast if PyMuPDF is missing; it is only imported where PDFs are parsed."""
     try:
-        if verbose:
-            print(f"    Downloading PDF from {url[:80]}...")
-
-        response = requests.get(url, timeout=30, headers={
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-        })
-        response.raise_for_status()
-
-        pdf_file = io.BytesIO(response.content)
-        reader = PyPDF2.PdfReader(pdf_file)
-
-        text_parts = []
-        total_chars = 0
-
-        for i, page in enumerate(reader.pages[:15]):  # Max 15 pages
-            try:
-                page_text = page.extract_text() or ""
-                text_parts.append(page_text)
-                total_chars += len(page_text)
-
-                if total_chars >= max_chars:
-                    break
-            except Exception as e:
-                if verbose:
-                    print(f"    Warning: Could not extract page {i+1}: {e}")
-                continue
-
-        full_text = "\n".join(text_parts)
-
-        # Clean up: strip NUL bytes (some PDFs contain them) and whitespace
-        full_text = full_text.replace('\x00', '')
-        full_text = re.sub(r'\s+', ' ', full_text).strip()
-
-        if verbose:
-            print(f"    Extracted {len(full_text)} chars from {len(reader.pages)} pages")
-
-        return full_text[:max_chars] if full_text else None
-
-    except Exception as e:
-        print(f"    ERROR extracting PDF: {e}")
-        return None
-
-
-def enrich_with_ai(title: str, content_type: str, text: str, verbose: bool = False) -> Dict:
-    """Use gpt-4o-mini to generate tags and summary from extracted PDF text."""
-    from openai import OpenAI
-
-    client = OpenAI(api_key=OPENAI_API_KEY)
-
-    prompt = f"""Analyze this SchooLinks marketing PDF and generate search metadata.
+        import fitz  # noqa: F401
+    except ImportError:
+        print("ERROR: PyMuPDF not installed. Run: pip install PyMuPDF")
+        sys.exit(1)
 
-TITLE: {title}
-TYPE: {content_type}
 
-EXTRACTED TEXT:
-{text[:6000]}
+# Static instructions live in the system message so every request shares the
+# same prefix (eligible for OpenAI's automatic prompt caching); only the
+# per-PDF fields go in the user message.
+SYSTEM_PROMPT = """You are a marketing content analyst. Analyze SchooLinks marketing PDFs and generate structured metadata for search optimization.
 
-Generate (respond with valid JSON only):
-{{
+Respond with valid JSON only:
+{
   "enhanced_summary": "A 2-3 sentence summary of what this content covers. Be specific about the key takeaways.",
   "auto_tags": ["tag1", "tag2", ...],
   "key_topics": ["2-4 main topics"]
-}}
+}
 
 Tag categories to choose from (only include what's ACTUALLY in the content):
 - Personas: counselors, administrators, CTE coordinators, students, parents, district leaders
@@ -135,38 +90,125 @@ Tag categories to choose from (only include what's ACTUALLY in the content):
 
 Be selective - only include tags actually discussed in the content."""
 
+
+def enrich_with_ai(title: str, content_type: str, text: str, verbose: bool = False,
+                   use_cache: bool = True) -> Dict:
+    """Use gpt-4o-mini to generate tags and summary from extracted PDF text."""
+    prompt = f"""TITLE: {title}
+TYPE: {content_type}
+
+EXTRACTED TEXT:
+{truncate_tokens(text, PROMPT_TEXT_TOKENS)}"""
+
+    model = "gpt-4o-mini"
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+    cache_key = prompt_hash(model, messages)
+
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a marketing content analyst. Generate structured metadata for search optimization. Respond with valid JSON only."},
-                {"role": "user", "content": prompt}
-            ],
+        if use_cache:
+            cached = get_cached_response(cache_key)
+            if cached:
+                if verbose:
+                    print(f"    AI: cache hit for {title[:50]}")
+                return cached
+
+        response = create_chat_completion(
+            model=model,
+            messages=messages,
             temperature=0.3,
-            max_tokens=600
+            max_tokens=600,
+            response_format={"type": "json_object"}
         )
 
-        content = response.choices[0].message.content
-        json_match = re.search(r'\{[\s\S]*\}', content)
-        if json_match:
-            result = json.loads(json_match.group())
-            if verbose:
-                tags = result.get('auto_tags', [])
-                print(f"    AI: {len(tags)} tags, summary: {result.get('enhanced_summary', '')[:60]}...")
-            return result
-        return {}
+        result = json.loads(response.choices[0].message.content)
+        if result:
+            store_cached_response(cache_key, model, result)
+        if verbose:
+            tags = result.get('auto_tags', [])
+            print(f"    AI: {len(tags)} tags, summary: {result.get('enhanced_summary', '')[:60]}...")
+        return result
 
     except Exception as e:
         print(f"    AI enrichment error: {e}")
         return {}
 
 
+def process_row(title: str, content_type: str, url: str, re_enrich: bool = False,
+                verbose: bool = False, use_cache: bool = True) -> Optional[Dict]:
+    """Extract (and optionally re-enrich) a single record.
+
+    Runs in a worker thread and only does network work; returns the fields to
+    write, or None if no usable text could be extracted.
+    """
+    pdf_text = extract_pdf_text(url, verbose=verbose)
+
+    if not pdf_text or len(pdf_text) < 50:
+        return None
+
+    update_fields = {
+        'extracted_text': pdf_text[:5000],
+        'extraction_error': None,
+    }
+
+    # Optionally re-enrich with AI
+    if re_enrich:
+        ai_result = enrich_with_ai(title, content_type, pdf_text, verbose=verbose, use_cache=use_cache)
+        if ai_result:
+            if ai_result.get('enhanced_summary'):
+                update_fields['enhanced_summary'] = ai_result['enhanced_summary']
+            if ai_result.get('auto_tags'):
+                tags = ai_result['auto_tags']
+                if isinstance(tags, list):
+                    tags = ', '.join(tags)
+                update_fields['auto_tags'] = tags
+
+    return update_fields
+
+
+def flush_updates(conn, pending_updates: list, pending_errors: list):
+    """Write buffered results with one statement per outcome and a single commit."""
+    # One client-side timestamp per batch instead of per-row NOW()/utcnow()
+    analyzed_at = datetime.now(timezone.utc)
+
+    with conn.cursor() as cur:
+        if pending_updates:
+            execute_values(cur, """
+                UPDATE marketing_content AS m
+                SET extracted_text = v.extracted_text,
+                    auto_tags = COALESCE(v.auto_tags, m.auto_tags),
+                    enhanced_summary = COALESCE(v.enhanced_summary, m.enhanced_summary),
+                    content_analyzed_at = v.analyzed_at,
+                    extraction_error = NULL
+                FROM (VALUES %s) AS v(id, extracted_text, auto_tags, enhanced_summary, analyzed_at)
+                WHERE m.id = v.id::uuid
+            """, [values + (analyzed_at,) for values in pending_updates],
+                template="(%s, %s, %s, %s, %s)")
+
+        if pending_errors:
+            execute_values(cur, """
+                UPDATE marketing_content AS m
+                SET extraction_error = 'PDF text extraction failed - possibly scanned/image PDF'
+                FROM (VALUES %s) AS v(id)
+                WHERE m.id = v.id::uuid
+            """, [(content_id,) for content_id in pending_errors])
+
+    conn.commit()
+    print(f"  Saved {len(pending_updates) + len(pending_errors)} records")
+    pending_updates.clear()
+    pending_errors.clear()
+
+
 def main():
     parser = argparse.ArgumentParser(description='Extract real PDF text for ebooks/1-pagers')
     parser.add_argument('--dry-run', action='store_true', help='Preview without making changes')
     parser.add_argument('--re-enrich', action='store_true', help='Also re-run AI enrichment')
     parser.add_argument('--force', action='store_true', help='Re-extract all PDFs, not just bad ones')
     parser.add_argument('--limit', type=int, default=0, help='Limit number of records to process')
+    parser.add_argument('--workers', type=int, default=5, help='Number of parallel download/AI workers')
+    parser.add_argument('--no-cache', action='store_true', help='Ignore cached AI responses (still refreshes the cache)')
     parser.add_argument('-v', '--verbose', action='store_true', help='Verbose output')
     args = parser.parse_args()
 
@@ -182,8 +224,10 @@ def main():
         print("ERROR: OPENAI_API_KEY required for --re-enrich")
         sys.exit(1)
 
+    init_db_pool(max_conn=args.workers + 2)
     conn = get_db_connection()
-    cur = conn.cursor()
+    # Plain tuple cursor for the list query; rows are unpacked positionally
+    cur = conn.cursor(cursor_factory=psycopg2.extensions.cursor)
 
     # Build query based on mode
     if args.force:
@@ -192,22 +236,19 @@ def main():
             SELECT id, title, type, ungated_link, LENGTH(extracted_text) as text_len
             FROM marketing_content
             WHERE ungated_link LIKE '%%.pdf'
-              AND type IN ('Ebook', '1-Pager')
+              AND type = ANY(%s)
             ORDER BY title
-        """)
+        """, (PDF_CONTENT_TYPES,))
     else:
         # Only records with Webflow wrapper text
-        wrapper_conditions = " OR ".join(
-            f"extracted_text LIKE '{p}'" for p in WRAPPER_PATTERNS
-        )
-        cur.execute(f"""
+        cur.execute("""
             SELECT id, title, type, ungated_link, LENGTH(extracted_text) as text_len
             FROM marketing_content
             WHERE ungated_link LIKE '%%.pdf'
-              AND type IN ('Ebook', '1-Pager')
-              AND ({wrapper_conditions} OR extracted_text IS NULL OR LENGTH(extracted_text) < 100)
+              AND type = ANY(%s)
+              AND (extracted_text LIKE ANY(%s) OR extracted_text IS NULL OR LENGTH(extracted_text) < 100)
             ORDER BY title
-        """)
+        """, (PDF_CONTENT_TYPES, WRAPPER_PATTERNS))
 
     rows = cur.fetchall()
 
@@ -223,77 +264,73 @@ def main():
 
     if not rows:
         print("Nothing to process!")
-        conn.close()
+        return_db_connection(conn)
+        close_db_pool()
         return
 
     success = 0
     failed = 0
     skipped = 0
 
-    for i, row in enumerate(rows):
-        print(f"[{i+1}/{len(rows)}] [{row['type']}] {row['title'][:60]}")
-
-        if args.dry_run:
-            print(f"  PDF: {row['ungated_link'][:70]}...")
-            print(f"  Current text: {row['text_len'] or 0} chars")
+    if args.dry_run:
+        for i, (_, title, content_type, url, text_len) in enumerate(rows):
+            print(f"[{i+1}/{len(rows)}] [{content_type}] {title[:60]}")
+            print(f"  PDF: {url[:70]}...")
+            print(f"  Current text: {text_len or 0} chars")
             success += 1
-            continue
-
-        # Extract PDF text
-        pdf_text = extract_pdf_text(row['ungated_link'], verbose=args.verbose)
+    else:
+        pending_updates = []
+        pending_errors = []
 
-        if not pdf_text or len(pdf_text) < 50:
-            print(f"  SKIP: Could not extract text (scanned PDF or empty)")
-            cur.execute("""
-                UPDATE marketing_content
-                SET extraction_error = 'PDF text extraction failed - possibly scanned/image PDF'
-                WHERE id = %s
-            """, (row['id'],))
-            conn.commit()
-            skipped += 1
-            continue
-
-        print(f"  Extracted {len(pdf_text)} chars")
-
-        # Prepare update fields
-        update_fields = {
-            'extracted_text': pdf_text[:5000],
-            'extraction_error': None,
-            'content_analyzed_at': datetime.utcnow(),
-        }
-
-        # Optionally re-enrich with AI
+        require_pymupdf()
+        init_parse_pool()
         if args.re_enrich:
-            ai_result = enrich_with_ai(row['title'], row['type'], pdf_text, verbose=args.verbose)
-            if ai_result:
-                if ai_result.get('enhanced_summary'):
-                    update_fields['enhanced_summary'] = ai_result['enhanced_summary']
-                if ai_result.get('auto_tags'):
-                    tags = ai_result['auto_tags']
-                    if isinstance(tags, list):
-                        tags = ', '.join(tags)
-                    update_fields['auto_tags'] = tags
-
-        # Update database
-        set_clause = ', '.join(f"{k} = %s" for k in update_fields.keys())
-        values = list(update_fields.values()) + [row['id']]
-
-        cur.execute(f"""
-            UPDATE marketing_content
-            SET {set_clause}
-            WHERE id = %s
-        """, values)
-        conn.commit()
-
-        success += 1
-        print(f"  Updated")
-
-        # Rate limit
-        delay = 1.0 if args.re_enrich else 0.3
-        if i < len(rows) - 1:
-            time.sleep(delay)
-
-    conn.close()
+            get_openai_client()  # Build the one shared client before workers race to create it
+
+        # Downloads and AI calls run in worker threads; this thread batches the DB writes
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            futures = {
+                executor.submit(
+                    process_row, title, content_type, url, args.re_enrich, args.verbose, not args.no_cache
+                ): (content_id, title, content_type)
+                for content_id, title, content_type, url, _ in rows
+            }
+
+            for i, future in enumerate(as_completed(futures), 1):
+                content_id, title, content_type = futures[future]
+                print(f"[{i}/{len(rows)}] [{content_type}] {title[:60]}")
+
+                try:
+                    update_fields = future.result()
+                except Exception as e:
+                    print(f"  ERROR: {e}")
+                    failed += 1
+                    continue
+
+                if update_fields is None:
+                    print(f"  SKIP: Could not extract text (scanned PDF or empty)")
+                    pending_errors.append(content_id)
+                    skipped += 1
+                else:
+                    print(f"  Extracted {len(update_fields['extracted_text'])} chars")
+                    pending_updates.append((
+                        content_id,
+                        update_fields['extracted_text'],
+                        update_fields.get('auto_tags'),
+                        update_fields.get('enhanced_summary'),
+                    ))
+                    success += 1
+
+                if len(pending_updates) + len(pending_errors) >= FLUSH_EVERY:
+                    flush_updates(conn, pending_updates, pending_errors)
+
+        if pending_updates or pending_errors:
+            flush_updates(conn, pending_updates, pending_errors)
+
+        shutdown_parse_pool()
+
+    return_db_connection(conn)
+    close_db_pool()
 
     print("\n" + "=" * 60)
     action = "Would process" if args.dry_run else "Processed"
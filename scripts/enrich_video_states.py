@@ -14,29 +14,48 @@ Usage:
     python enrich_video_states.py              # Enrich all videos missing state
     python enrich_video_states.py --dry-run    # Preview without changes
     python enrich_video_states.py --limit 10   # Process only 10 records
+    python enrich_video_states.py --workers 10 # Analyze 10 videos at a time
+    python enrich_video_states.py --batch      # Bulk run via the OpenAI Batch API (half price)
+    python enrich_video_states.py --collect-batch batch_abc123  # Write a finished batch's results
+    python enrich_video_states.py --no-cache   # Ignore cached AI answers
+
+Parallel runs claim disjoint sets of videos, so a backlog can be split:
+    for i in 1 2 3 4; do python enrich_video_states.py --limit 500 & done; wait
 """
 
-import os
 import sys
 import argparse
 import json
 import re
-import time
-from datetime import datetime
-from typing import Optional, Dict, Any, List
-
-import psycopg2
-from psycopg2.extras import RealDictCursor
-from dotenv import load_dotenv
-from openai import OpenAI
-
-# Load environment variables
-load_dotenv()
-
-DATABASE_URL = os.getenv('DATABASE_URL')
-OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
-
-openai_client = OpenAI(api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
+import hashlib
+from itertools import chain
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from psycopg2.extras import Json, execute_values
+
+from _enrich_common import (
+    DATABASE_URL, OPENAI_API_KEY, CHAT_MODEL, TEMPERATURE, FLUSH_EVERY, FLUSH_WRITERS, openai_client,
+    init_db_pool, get_db_connection, return_db_connection, close_db_pool, submit_flush,
+    add_common_arguments, cache_kind, candidate_query, release_claims,
+    create_chat_completion, submit_batch_requests, fetch_batch_results,
+)
+
+# Prompt caps: state clues sit near the start, the tails mostly cost tokens
+PROMPT_SUMMARY_CHARS = 300
+PROMPT_TRANSCRIPT_CHARS = 1200
+
+# Only what the pattern matcher and prompt use; long text is cut server-side
+# (summary keeps 500 chars for the pattern matcher), so full transcripts never
+# leave Postgres
+VIDEO_COLUMNS = f"""
+    id, title, type, tags, auto_tags, state,
+    LEFT(summary, 500) AS summary,
+    LEFT(enhanced_summary, {PROMPT_SUMMARY_CHARS}) AS enhanced_summary,
+    LEFT(extracted_text, {PROMPT_TRANSCRIPT_CHARS}) AS extracted_text,
+    LENGTH(extracted_text) AS transcript_len
+"""
 
 # SchooLinks context for AI reasoning
 SCHOOLINKS_CONTEXT = """
@@ -69,6 +88,21 @@ TAG CATEGORIES (only use if actually present):
 - Format: testimonial, demo, tutorial, customer-story, comparison
 """
 
+# Everything static goes in the system message so the prefix is identical on
+# every call (eligible for OpenAI's automatic prompt caching); the user message
+# carries only the per-video fields.
+SYSTEM_PROMPT = f"""You are a marketing content analyst for SchooLinks. Infer the US state a video is about and tag it. Respond with a JSON object.
+{SCHOOLINKS_CONTEXT}
+inferred_state: 2-letter abbreviation from district, city, or state references; null for general/national content.
+improved_tags: only what the content actually shows (competitors named, personas, topics, format).
+
+JSON keys: inferred_state ("XX" or null), state_reasoning (brief), improved_tags (list), competitors_mentioned (list), is_customer_story (bool), confidence ("high" | "medium" | "low")."""
+
+# Response cache (marketing_content_cache, shared with enrich_video_tags.py).
+# Exact matches only: near-identical inputs often differ only in the district
+# or city name, which is exactly what decides the state.
+CACHE_KIND = cache_kind('video_states', SYSTEM_PROMPT)
+
 # US State mappings for extraction
 STATE_MAPPINGS = {
     'alabama': 'AL', 'alaska': 'AK', 'arizona': 'AZ', 'arkansas': 'AR',
@@ -113,16 +147,15 @@ CITY_STATE_MAPPINGS = {
 }
 
 
-def get_db_connection():
-    """Create database connection with retry."""
-    for attempt in range(3):
-        try:
-            return psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor)
-        except Exception as e:
-            if attempt < 2:
-                time.sleep(1)
-            else:
-                raise e
+# Precomputed for extract_state_from_text, which runs on every video
+_ABBREV_RE = re.compile(r'\b([A-Z]{2})\b', re.ASCII)  # ASCII word boundaries skip the Unicode tables
+_VALID_ABBREVS = frozenset(STATE_MAPPINGS.values())
+_STATE_PHRASES = (
+    *STATE_MAPPINGS.items(),
+    *CITY_STATE_MAPPINGS.items(),
+    (' isd', 'TX'), ('independent school district', 'TX'),  # ISDs are primarily Texas
+    ('parish', 'LA'),
+)
 
 
 def extract_state_from_text(text: str) -> Optional[str]:
@@ -130,41 +163,57 @@ def extract_state_from_text(text: str) -> Optional[str]:
     if not text:
         return None
 
-    text_lower = text.lower()
-
     # Check for state abbreviations (2 capital letters)
-    abbrev_match = re.search(r'\b([A-Z]{2})\b', text)
-    if abbrev_match:
-        abbrev = abbrev_match.group(1)
-        if abbrev in STATE_MAPPINGS.values():
-            return abbrev
-
-    # Check for full state names
-    for state_name, abbrev in STATE_MAPPINGS.items():
-        if state_name in text_lower:
-            return abbrev
-
-    # Check for known cities
-    for city, state in CITY_STATE_MAPPINGS.items():
-        if city in text_lower:
+    abbrev_match = _ABBREV_RE.search(text)
+    if abbrev_match and abbrev_match.group(1) in _VALID_ABBREVS:
+        return abbrev_match.group(1)
+
+    # State names, then known cities, then Texas ISD / Louisiana parish patterns
+    text_lower = text.lower()
+    for phrase, state in _STATE_PHRASES:
+        if phrase in text_lower:
             return state
 
-    # Check for Texas ISD pattern
-    if ' isd' in text_lower or 'independent school district' in text_lower:
-        return 'TX'  # ISDs are primarily Texas
+    return None
 
-    # Check for Louisiana parish
-    if 'parish' in text_lower:
-        return 'LA'
 
-    return None
+def cache_key(video: Dict) -> str:
+    """Exact-match cache key over the prompt's inputs, case- and whitespace-normalized."""
+    fields = [
+        video.get('title'), video.get('type'), video.get('state'), video.get('tags'), video.get('auto_tags'),
+        (video.get('summary') or '')[:PROMPT_SUMMARY_CHARS],
+        (video.get('enhanced_summary') or '')[:PROMPT_SUMMARY_CHARS],
+        (video.get('extracted_text') or '')[:PROMPT_TRANSCRIPT_CHARS],
+    ]
+    normalized = ' '.join('|'.join(str(f or '') for f in fields).lower().split())
+    return hashlib.sha256(f"{CACHE_KIND}|{normalized}".encode('utf-8')).hexdigest()
 
 
-def analyze_video_with_ai(record: Dict) -> Dict[str, Any]:
-    """Use AI to analyze video and extract state + improved tags."""
-    if not openai_client:
-        return {'error': 'No OpenAI client'}
+def load_cached_analyses(conn, keys: Dict) -> Dict:
+    """Map video id to its cached analysis, looking up every key in one query."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT input_hash, response FROM marketing_content_cache
+            WHERE kind = %s AND input_hash = ANY(%s)
+        """, (CACHE_KIND, list(set(keys.values()))))
+        by_hash = {row['input_hash']: row['response'] for row in cur.fetchall()}
+    conn.commit()
+    return {video_id: by_hash[key] for video_id, key in keys.items() if key in by_hash}
 
+
+def store_cached_analyses(conn, rows: List[tuple]):
+    """Save (input_hash, analysis) rows; existing hashes are kept."""
+    with conn.cursor() as cur:
+        execute_values(cur, """
+            INSERT INTO marketing_content_cache (input_hash, kind, response)
+            VALUES %s
+            ON CONFLICT (input_hash) DO NOTHING
+        """, [(key, CACHE_KIND, Json(analysis)) for key, analysis in rows])
+    conn.commit()
+
+
+def build_request(record: Dict) -> Dict[str, Any]:
+    """Chat completion parameters for one video (shared by the live and Batch API paths)."""
     title = record.get('title', '')
     existing_tags = record.get('tags', '') or ''
     auto_tags = record.get('auto_tags', '') or ''
@@ -174,107 +223,145 @@ def analyze_video_with_ai(record: Dict) -> Dict[str, Any]:
     content_type = record.get('type', 'Video')
     current_state = record.get('state', '')
 
-    # Build context from available data
-    has_transcript = len(extracted_text) > 100
-
-    prompt = f"""{SCHOOLINKS_CONTEXT}
-
-ANALYZE THIS VIDEO CONTENT:
-- Title: {title}
-- Type: {content_type}
-- Current State: {current_state or 'Not set'}
-- Existing Tags: {existing_tags}
-- Auto Tags: {auto_tags}
-- Summary: {summary[:500] if summary else 'None'}
-- Enhanced Summary: {enhanced_summary[:500] if enhanced_summary else 'None'}
-{'- Transcript excerpt: ' + extracted_text[:2000] if has_transcript else '- No transcript available'}
-
-TASK: Analyze this video and determine:
-
-1. STATE: Based on the title, tags, summary, and transcript, what US state is this content about?
-   - Look for school district names, city names, state references
-   - If it's a general/national video with no state focus, return null
-   - Return the 2-letter state abbreviation (TX, CA, FL, etc.)
-
-2. IMPROVED TAGS: Based on SchooLinks context, what tags should this video have?
-   - Only include tags that are ACTUALLY evident from the content
-   - Include competitor names if mentioned (Xello, Naviance, etc.)
-   - Include personas if addressed (counselors, students, etc.)
-   - Include topics if covered (FAFSA, WBL, graduation, etc.)
-   - Include format (testimonial, demo, comparison, etc.)
-
-Respond with ONLY valid JSON:
-{{
-  "inferred_state": "XX" or null,
-  "state_reasoning": "Brief explanation of why this state was inferred",
-  "improved_tags": ["tag1", "tag2", ...],
-  "competitors_mentioned": ["competitor1", ...] or [],
-  "is_customer_story": true/false,
-  "confidence": "high" | "medium" | "low"
-}}"""
+    # Build context from available data (extracted_text arrives pre-truncated)
+    has_transcript = (record.get('transcript_len') or 0) > 100
+
+    prompt = f"""TITLE: {title}
+TYPE: {content_type}
+STATE: {current_state or 'Not set'}
+TAGS: {existing_tags}
+AUTO TAGS: {auto_tags}
+SUMMARY: {summary[:PROMPT_SUMMARY_CHARS] or 'None'}
+ENHANCED SUMMARY: {enhanced_summary[:PROMPT_SUMMARY_CHARS] or 'None'}
+TRANSCRIPT: {extracted_text[:PROMPT_TRANSCRIPT_CHARS] if has_transcript else 'None'}"""
+
+    return {
+        "model": CHAT_MODEL,
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        "temperature": TEMPERATURE,
+        "max_tokens": 400,
+        "response_format": {"type": "json_object"},
+    }
+
+
+def analyze_video_with_ai(record: Dict) -> Dict[str, Any]:
+    """Use AI to analyze video and extract state + improved tags."""
+    if not openai_client:
+        return {'error': 'No OpenAI client'}
 
     try:
-        response = openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a marketing content analyst for SchooLinks. Analyze video content to extract state information and improve tagging. Always respond with valid JSON only."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2,
-            max_tokens=800
-        )
-
-        content = response.choices[0].message.content
-        json_match = re.search(r'\{[\s\S]*\}', content)
-        if json_match:
-            return json.loads(json_match.group())
-        return {'error': 'Could not parse JSON response'}
+        response = create_chat_completion(**build_request(record))
+        return json.loads(response.choices[0].message.content)
 
     except Exception as e:
         return {'error': str(e)}
 
 
-def update_video_record(conn, record_id: int, state: str, new_tags: List[str], analysis: Dict):
-    """Update video record with inferred state and improved tags."""
-    with conn.cursor() as cur:
-        updates = []
-        values = []
+def pattern_state(video: Dict) -> Optional[str]:
+    """State from simple pattern matching on title, tags, and summary."""
+    text_to_check = f"{video['title']} {video.get('tags', '')} {video.get('summary', '')}"
+    return extract_state_from_text(text_to_check)
+
+
+def needs_ai(video: Dict, simple_state: Optional[str], process_all: bool) -> bool:
+    """A pattern match settles the state; the AI is only needed when matching
+    fails, or under --all when the video also has no auto_tags yet."""
+    return not simple_state or (process_all and not video.get('auto_tags'))
+
+
+def pattern_result(simple_state: str) -> Dict[str, Any]:
+    """Analysis for a video whose state came from pattern matching alone."""
+    return {'inferred_state': simple_state, 'improved_tags': [], 'state_source': 'pattern'}
+
+
+def finish_analysis(analysis: Dict[str, Any], simple_state: Optional[str]) -> Dict[str, Any]:
+    """Record where the state came from, preferring a pattern match over the AI."""
+    if 'error' not in analysis:
+        analysis['state_source'] = 'ai'
+        if simple_state:
+            analysis['inferred_state'] = simple_state
+            analysis['state_source'] = 'pattern'
+    return analysis
+
+
+def process_video(video: Dict, process_all: bool = False) -> Tuple[Dict[str, Any], bool]:
+    """Infer state (and, via AI, tags) for one video.
+
+    Runs in a worker thread and does no DB access. Returns (analysis, used_ai).
+    """
+    simple_state = pattern_state(video)
+    if not needs_ai(video, simple_state, process_all):
+        return pattern_result(simple_state), False
+
+    # Use AI for more complex analysis
+    return finish_analysis(analyze_video_with_ai(video), simple_state), True
 
-        # Update state if inferred and not already set
-        if state:
-            updates.append("state = %s")
-            values.append(state)
 
-        # Update tags if improved
-        if new_tags:
-            tags_str = ', '.join(new_tags)
-            updates.append("auto_tags = %s")
-            values.append(tags_str)
+def submit_batch(videos: List[Dict], process_all: bool) -> List[tuple]:
+    """Send every video that needs the AI to the OpenAI Batch API.
 
-        # Mark as analyzed
-        updates.append("content_analyzed_at = %s")
-        values.append(datetime.utcnow())
+    Returns (video, analysis, used_ai) results for the videos pattern matching
+    settled; the rest are written later by --collect-batch.
+    """
+    results = []
+    batch_requests = {}
+    for video in videos:
+        simple_state = pattern_state(video)
+        if needs_ai(video, simple_state, process_all):
+            batch_requests[str(video['id'])] = build_request(video)
+        else:
+            results.append((video, pattern_result(simple_state), False))
+
+    if batch_requests:
+        batch_id = submit_batch_requests(batch_requests, 'video_states')
+        print(f"\nSubmitted batch {batch_id} with {len(batch_requests)} videos")
+        print(f"  Collect later with: python enrich_video_states.py --collect-batch {batch_id}")
+    return results
 
-        if updates:
-            values.append(record_id)
-            cur.execute(f"""
-                UPDATE marketing_content
-                SET {', '.join(updates)}
-                WHERE id = %s
-            """, values)
-            conn.commit()
-            return True
 
-    return False
+def collect_batch(videos: List[Dict], responses: Dict[str, Dict]) -> List[tuple]:
+    """(video, analysis, used_ai) results for a finished batch's responses."""
+    results = []
+    for video in videos:
+        analysis = responses.get(str(video['id']), {'error': 'No result in batch output'})
+        results.append((video, finish_analysis(analysis, pattern_state(video)), True))
+    return results
+
+
+def flush_updates(conn, pending: List[tuple]):
+    """Write buffered (id, state, state_source, tags) results in one statement and one commit.
+
+    A NULL state or tags value leaves the existing column untouched; every row
+    is marked analyzed with the same batch timestamp.
+    """
+    analyzed_at = datetime.now(timezone.utc)
+    with conn.cursor() as cur:
+        execute_values(cur, """
+            UPDATE marketing_content AS m
+            SET state = COALESCE(v.state, m.state),
+                state_source = COALESCE(v.state_source, m.state_source),
+                auto_tags = COALESCE(v.tags, m.auto_tags),
+                content_analyzed_at = v.analyzed_at
+            FROM (VALUES %s) AS v(id, state, state_source, tags, analyzed_at)
+            WHERE m.id = v.id::uuid
+        """, [values + (analyzed_at,) for values in pending], template="(%s, %s, %s, %s, %s)")
+    conn.commit()
+    print(f"  Saved {len(pending)} records")
+    pending.clear()
 
 
 def main():
     parser = argparse.ArgumentParser(description='Enrich video content with state and tags')
-    parser.add_argument('--dry-run', action='store_true', help='Preview without making changes')
-    parser.add_argument('--limit', type=int, default=0, help='Limit number of records to process')
     parser.add_argument('--all', action='store_true', help='Process all videos, not just those missing state')
+    add_common_arguments(parser)
     args = parser.parse_args()
 
+    if args.batch and args.dry_run:
+        parser.error('--batch submits paid requests; it cannot be combined with --dry-run')
+
     print("=" * 60)
     print("Video State & Tag Enrichment")
     print("=" * 60)
@@ -287,89 +374,128 @@ def main():
         print("ERROR: OPENAI_API_KEY not set")
         sys.exit(1)
 
+    init_db_pool()
     conn = get_db_connection()
     print("✓ Connected to database")
 
     # Get videos to process
     with conn.cursor() as cur:
-        if args.all:
-            # Process all videos
-            query = """
-                SELECT * FROM marketing_content
-                WHERE type IN ('Video', 'Video Clip')
-                ORDER BY last_updated DESC
+        if args.collect_batch:
+            # The videos that were submitted, whether or not they still match the filters
+            responses = fetch_batch_results(args.collect_batch)
+            query = f"""
+                SELECT {VIDEO_COLUMNS} FROM marketing_content
+                WHERE id = ANY(%s::uuid[])
             """
+            params = (list(responses),)
+            if args.limit > 0:
+                query += f" LIMIT {args.limit}"
         else:
-            # Only videos missing state
-            query = """
-                SELECT * FROM marketing_content
-                WHERE type IN ('Video', 'Video Clip')
-                  AND (state IS NULL OR state = '')
-                ORDER BY last_updated DESC
-            """
-
-        if args.limit > 0:
-            query += f" LIMIT {args.limit}"
-
-        cur.execute(query)
+            # All videos with --all, otherwise only those missing state
+            where = "type IN ('Video', 'Video Clip')"
+            if not args.all:
+                where += " AND (state IS NULL OR state = '')"
+            # Dry runs only look, so they don't claim rows away from real runs
+            query, params = candidate_query('video_states', VIDEO_COLUMNS, where, args.limit, claim=not args.dry_run)
+
+        cur.execute(query, params)
         videos = cur.fetchall()
+    conn.commit()
 
-    print(f"Found {len(videos)} videos to process")
-
-    if not videos:
-        print("No videos need processing")
-        conn.close()
-        return
-
-    # Process each video
-    updated = 0
-    skipped = 0
-    errors = 0
-
-    for i, video in enumerate(videos, 1):
-        title = video['title'][:50]
-        print(f"\n[{i}/{len(videos)}] {title}...")
-
-        # First try simple pattern matching
-        text_to_check = f"{video['title']} {video.get('tags', '')} {video.get('summary', '')}"
-        simple_state = extract_state_from_text(text_to_check)
-
-        if simple_state and not args.all:
-            # Use pattern match for state
-            print(f"  → Pattern match: {simple_state}")
-            if not args.dry_run:
-                update_video_record(conn, video['id'], simple_state, [], {})
-            updated += 1
-            continue
-
-        # Use AI for more complex analysis
-        analysis = analyze_video_with_ai(video)
-
-        if 'error' in analysis:
-            print(f"  ✗ AI error: {analysis['error']}")
-            errors += 1
-            continue
-
-        inferred_state = analysis.get('inferred_state')
-        improved_tags = analysis.get('improved_tags', [])
-        confidence = analysis.get('confidence', 'low')
-        reasoning = analysis.get('state_reasoning', '')
-
-        print(f"  → AI inferred: state={inferred_state} ({confidence}), tags={len(improved_tags)}")
-        if reasoning:
-            print(f"    Reasoning: {reasoning[:80]}...")
-
-        if inferred_state or improved_tags:
-            if not args.dry_run:
-                update_video_record(conn, video['id'], inferred_state, improved_tags, analysis)
-            updated += 1
-        else:
-            skipped += 1
+    # Claims are released when the run ends, failed or not
+    claiming = not args.dry_run and not args.collect_batch
 
-        # Rate limit
-        time.sleep(0.3)
-
-    conn.close()
+    try:
+        print(f"Found {len(videos)} videos to process")
+
+        if not videos:
+            print("No videos need processing")
+            return
+
+        # Process each video
+        updated = 0
+        skipped = 0
+        errors = 0
+
+        keys = {video['id']: cache_key(video) for video in videos}
+        cached = {} if args.collect_batch or args.no_cache else load_cached_analyses(conn, keys)
+        print(f"  {len(cached)} cached analyses reused")
+        new_cache_rows = []
+        pending = []
+
+        # Each worker runs a whole process_video (pattern match, AI call, JSON parse),
+        # so one video's CPU prep overlaps other videos' API calls; this thread
+        # only prints results and hands full batches to the writer threads
+        flushes = []
+        with ThreadPoolExecutor(max_workers=args.workers) as executor, \
+                ThreadPoolExecutor(max_workers=FLUSH_WRITERS) as writer:
+            uncached = [video for video in videos if video['id'] not in cached]
+            if args.collect_batch:
+                fresh = collect_batch(uncached, responses)
+            elif args.batch:
+                fresh = submit_batch(uncached, args.all)
+            else:
+                futures = {executor.submit(process_video, video, args.all): video for video in uncached}
+                fresh = ((futures[future], *future.result()) for future in as_completed(futures))
+            results = chain(
+                ((video, cached[video['id']], False) for video in videos if video['id'] in cached),
+                fresh,
+            )
+
+            for i, (video, analysis, used_ai) in enumerate(results, 1):
+                if len(pending) >= FLUSH_EVERY:
+                    flushes.append(submit_flush(writer, flush_updates, pending))
+
+                title = video['title'][:50]
+                print(f"\n[{i}/{len(videos)}] {title}...")
+
+                if 'error' in analysis:
+                    print(f"  ✗ AI error: {analysis['error']}")
+                    errors += 1
+                    continue
+
+                if used_ai and not args.no_cache:
+                    new_cache_rows.append((keys[video['id']], analysis))
+
+                inferred_state = analysis.get('inferred_state')
+                improved_tags = analysis.get('improved_tags', [])
+                state_source = analysis.get('state_source', 'ai')
+
+                if state_source == 'pattern':
+                    print(f"  → Pattern match: {inferred_state}")
+                if 'confidence' in analysis:
+                    confidence = analysis.get('confidence', 'low')
+                    reasoning = analysis.get('state_reasoning', '')
+                    print(f"  → AI inferred: state={inferred_state} ({confidence}), tags={len(improved_tags)}")
+                    if reasoning:
+                        print(f"    Reasoning: {reasoning[:80]}...")
+
+                if inferred_state or improved_tags:
+                    if not args.dry_run:
+                        pending.append((
+                            video['id'],
+                            inferred_state,
+                            state_source if inferred_state else None,
+                            ', '.join(improved_tags) or None,
+                        ))
+                    updated += 1
+                else:
+                    skipped += 1
+
+            if pending:
+                flushes.append(submit_flush(writer, flush_updates, pending))
+
+        # Surface any write error now that every batch has finished
+        for flush in flushes:
+            flush.result()
+
+        if new_cache_rows and not args.dry_run:
+            store_cached_analyses(conn, new_cache_rows)
+    finally:
+        if claiming:
+            release_claims(conn, 'video_states', [video['id'] for video in videos])
+        return_db_connection(conn)
+        close_db_pool()
 
     print("\n" + "=" * 60)
     print("ENRICHMENT COMPLETE")
@@ -2,7 +2,8 @@
 """
 Video Tag Enrichment Script
 
-For videos WITHOUT transcripts, uses AI to analyze titles and generate:
+For videos WITHOUT transcripts, matches titles against the SchooLinks keyword
+rules (AI only as an opt-in fallback) to generate:
 - Better tags based on SchooLinks context
 - Competitor mentions
 - Persona targeting
@@ -10,31 +11,41 @@ For videos WITHOUT transcripts, uses AI to analyze titles and generate:
 
 Usage:
     python enrich_video_tags.py              # Enrich videos without transcripts
+    python enrich_video_tags.py --llm-fallback  # Ask AI when the rules aren't confident
     python enrich_video_tags.py --dry-run    # Preview without changes
     python enrich_video_tags.py --limit 20   # Process only 20 records
+    python enrich_video_tags.py --workers 10 # Analyze 10 titles at a time
+    python enrich_video_tags.py --batch      # Bulk run via the OpenAI Batch API (half price)
+    python enrich_video_tags.py --collect-batch batch_abc123  # Write a finished batch's results
+    python enrich_video_tags.py --no-cache   # Ignore cached AI answers
+
+Parallel runs claim disjoint sets of videos, so a backlog can be split:
+    for i in 1 2 3 4; do python enrich_video_tags.py --limit 500 & done; wait
 """
 
-import os
 import sys
 import argparse
 import json
 import re
-import time
-from datetime import datetime
-from typing import Optional, Dict, Any, List
-
-import psycopg2
-from psycopg2.extras import RealDictCursor
-from dotenv import load_dotenv
-from openai import OpenAI
-
-# Load environment variables
-load_dotenv()
-
-DATABASE_URL = os.getenv('DATABASE_URL')
-OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
-
-openai_client = OpenAI(api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
+import hashlib
+from itertools import chain
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from psycopg2.extras import Json, execute_values
+
+from _enrich_common import (
+    DATABASE_URL, OPENAI_API_KEY, CHAT_MODEL, TEMPERATURE, FLUSH_EVERY, FLUSH_WRITERS, openai_client,
+    init_db_pool, get_db_connection, return_db_connection, close_db_pool, submit_flush,
+    add_common_arguments, cache_kind, candidate_query, release_claims,
+    create_chat_completion, submit_batch_requests, fetch_batch_results,
+)
+
+# Response cache (marketing_content_cache, shared with enrich_video_states.py)
+EMBEDDING_MODEL = 'text-embedding-3-small'
+# Cosine distance under which a cached answer for a near-identical title is reused
+SEMANTIC_MATCH_DISTANCE = 0.08
 
 # SchooLinks context
 SCHOOLINKS_CONTEXT = """
@@ -79,17 +90,196 @@ FORMAT KEYWORDS:
 - overview: General feature tour
 """
 
+# Everything static goes in the system message so the prefix is identical on
+# every call (eligible for OpenAI's automatic prompt caching); the user message
+# carries only the per-video fields.
+SYSTEM_PROMPT = f"""You are a marketing content analyst for SchooLinks. Tag videos from their titles, selectively: only clearly relevant tags. Respond with a JSON object.
+{SCHOOLINKS_CONTEXT}
+Competitors only if named in the title. Also use persona, topic, format, and state/district clues.
+
+JSON keys: auto_tags (list), competitors_mentioned (list), personas (list), topics (list), format ("testimonial" | "demo" | "comparison" | "overview" | "general"), is_customer_story (bool), reasoning (brief)."""
+
+# Response cache namespace, tied to the current model/temperature/prompt
+CACHE_KIND = cache_kind('video_tags', SYSTEM_PROMPT)
+
+# Keyword rules (lowercase phrase -> canonical tag), encoded from SCHOOLINKS_CONTEXT.
+# Titles draw on this closed vocabulary, so matching covers most of them without AI.
+COMPETITOR_KEYWORDS = {
+    'xello': 'Xello',
+    'naviance': 'Naviance',
+    'scoir': 'Scoir',
+    'majorclarity': 'MajorClarity',
+    'major clarity': 'MajorClarity',
+    'azcis': 'AzCIS',
+    'powerschool': 'PowerSchool',
+}
+
+PERSONA_KEYWORDS = {
+    'counselor': 'counselors',
+    'counselors': 'counselors',
+    'administrator': 'administrators',
+    'administrators': 'administrators',
+    'admin': 'administrators',
+    'admins': 'administrators',
+    'cte': 'CTE',
+    'career technical education': 'CTE',
+    'wbl coordinator': 'WBL coordinators',
+    'wbl coordinators': 'WBL coordinators',
+    'student': 'students',
+    'students': 'students',
+    'parent': 'parents',
+    'parents': 'parents',
+}
+
+TOPIC_KEYWORDS = {
+    'fafsa': 'FAFSA',
+    'graduation': 'graduation',
+    'graduation tracking': 'graduation',
+    'wbl': 'WBL',
+    'work-based learning': 'WBL',
+    'work based learning': 'WBL',
+    'internship': 'WBL',
+    'internships': 'WBL',
+    'career exploration': 'career exploration',
+    'college readiness': 'college readiness',
+    'college planning': 'college readiness',
+    'course planning': 'course planning',
+    'course planner': 'course planning',
+    'compliance': 'compliance',
+    'indicators': 'compliance',
+    'kri': 'compliance',
+    'engagement': 'engagement',
+}
+
+# First match wins, so the more specific formats come first
+FORMAT_RULES = [
+    (re.compile(r'testimonial|customer story'), 'testimonial'),
+    (re.compile(r'\bvs\.?(?!\w)|comparison'), 'comparison'),
+    (re.compile(r'\bdemo\b'), 'demo'),
+    (re.compile(r'\boverview\b'), 'overview'),
+]
+
+
+def _keyword_re(keywords: Dict[str, str]) -> re.Pattern:
+    """Whole-word alternation over the phrases, longest first so 'wbl coordinator' beats 'wbl'."""
+    phrases = sorted(keywords, key=len, reverse=True)
+    return re.compile(r'\b(' + '|'.join(map(re.escape, phrases)) + r')\b')
+
+
+# Phrase -> (category index, tag) for competitors, personas, topics. One
+# alternation over all of them, so a phrase that contains another category's
+# phrase ('wbl coordinators' vs 'wbl') matches once, as the longer one.
+KEYWORD_CATEGORIES = {
+    phrase: (category, tag)
+    for category, keywords in enumerate((COMPETITOR_KEYWORDS, PERSONA_KEYWORDS, TOPIC_KEYWORDS))
+    for phrase, tag in keywords.items()
+}
+KEYWORD_RE = _keyword_re(KEYWORD_CATEGORIES)
+
+
+def cache_input(video: Dict) -> str:
+    """The prompt's variable input, case- and whitespace-normalized."""
+    raw = f"{video['title']}|{video['type']}|{video.get('tags') or ''}"
+    return ' '.join(raw.lower().split())
+
+
+def cache_key(text: str) -> str:
+    """Exact-match cache key for a normalized input."""
+    return hashlib.sha256(f"{CACHE_KIND}|{text}".encode('utf-8')).hexdigest()
+
+
+def embed_texts(texts: List[str]) -> List[str]:
+    """Embed texts (1000 per request) and return them as pgvector literals."""
+    vectors = []
+    for start in range(0, len(texts), 1000):
+        response = openai_client.embeddings.create(model=EMBEDDING_MODEL, input=texts[start:start + 1000])
+        vectors.extend('[' + ','.join(map(str, item.embedding)) + ']' for item in response.data)
+    return vectors
+
+
+def load_cached_analyses(conn, videos: List[Dict]) -> Tuple[Dict, Dict]:
+    """Find cached analyses: exact input match first, then nearest embedding.
+
+    Returns (hits, misses): hits maps video id to a cached analysis; misses maps
+    video id to (input_hash, embedding) for storing the fresh answer later.
+    """
+    inputs = {video['id']: cache_input(video) for video in videos}
+    keys = {video_id: cache_key(text) for video_id, text in inputs.items()}
 
-def get_db_connection():
-    """Create database connection with retry."""
-    for attempt in range(3):
-        try:
-            return psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor)
-        except Exception as e:
-            if attempt < 2:
-                time.sleep(1)
-            else:
-                raise e
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT input_hash, response FROM marketing_content_cache
+            WHERE kind = %s AND input_hash = ANY(%s)
+        """, (CACHE_KIND, list(set(keys.values()))))
+        by_hash = {row['input_hash']: row['response'] for row in cur.fetchall()}
+
+    hits = {video_id: by_hash[key] for video_id, key in keys.items() if key in by_hash}
+    pending = [video['id'] for video in videos if video['id'] not in hits]
+    if not pending:
+        conn.commit()
+        return hits, {}
+
+    try:
+        embeddings = embed_texts([inputs[video_id] for video_id in pending])
+    except Exception as e:
+        print(f"  Semantic cache unavailable ({e}); using exact matches only")
+        conn.commit()
+        return hits, {video_id: (keys[video_id], None) for video_id in pending}
+
+    # One round trip: nearest cached neighbor for every pending input
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT q.idx, c.response
+            FROM unnest(%s::int[], %s::text[]) AS q(idx, query_embedding)
+            CROSS JOIN LATERAL (
+                SELECT response, embedding <=> q.query_embedding::vector AS distance
+                FROM marketing_content_cache
+                WHERE kind = %s AND embedding IS NOT NULL
+                ORDER BY embedding <=> q.query_embedding::vector
+                LIMIT 1
+            ) c
+            WHERE c.distance < %s
+        """, (list(range(len(pending))), embeddings, CACHE_KIND, SEMANTIC_MATCH_DISTANCE))
+        for row in cur.fetchall():
+            hits[pending[row['idx']]] = row['response']
+    conn.commit()
+
+    misses = {
+        video_id: (keys[video_id], embedding)
+        for video_id, embedding in zip(pending, embeddings)
+        if video_id not in hits
+    }
+    return hits, misses
+
+
+def store_cached_analyses(conn, rows: List[Tuple]):
+    """Save (input_hash, embedding, analysis) rows; existing hashes are kept."""
+    with conn.cursor() as cur:
+        execute_values(cur, """
+            INSERT INTO marketing_content_cache (input_hash, kind, embedding, response)
+            VALUES %s
+            ON CONFLICT (input_hash) DO NOTHING
+        """, [(key, CACHE_KIND, embedding, Json(analysis)) for key, embedding, analysis in rows],
+            template="(%s, %s, %s::vector, %s)")
+    conn.commit()
+
+
+def build_request(title: str, content_type: str, existing_tags: str = '') -> Dict[str, Any]:
+    """Chat completion parameters for one title (shared by the live and Batch API paths)."""
+    prompt = f"""TITLE: {title}
+TYPE: {content_type}
+TAGS: {existing_tags or 'None'}"""
+
+    return {
+        "model": CHAT_MODEL,
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        "temperature": TEMPERATURE,
+        "max_tokens": 500,
+        "response_format": {"type": "json_object"},
+    }
 
 
 def analyze_title_with_ai(title: str, content_type: str, existing_tags: str = '') -> Dict[str, Any]:
@@ -97,86 +287,92 @@ def analyze_title_with_ai(title: str, content_type: str, existing_tags: str = ''
     if not openai_client:
         return {'error': 'No OpenAI client'}
 
-    prompt = f"""{SCHOOLINKS_CONTEXT}
-
-ANALYZE THIS VIDEO TITLE:
-Title: "{title}"
-Type: {content_type}
-Existing Tags: {existing_tags or 'None'}
-
-Based on the title, determine what this video is about and generate appropriate tags.
-
-RULES:
-1. Only tag competitors (Xello, Naviance, etc.) if EXPLICITLY mentioned in title
-2. Identify the target persona if clear (counselors, students, parents, admin, CTE)
-3. Identify the main topic (FAFSA, WBL, graduation, career exploration, etc.)
-4. Identify the format (testimonial, demo, comparison, overview)
-5. Look for state/district clues (school district names, state abbreviations)
-6. Be SELECTIVE - only include tags that are clearly relevant
-
-Respond with ONLY valid JSON:
-{{
-  "auto_tags": ["tag1", "tag2", ...],
-  "competitors_mentioned": ["competitor1", ...] or [],
-  "personas": ["persona1", ...] or [],
-  "topics": ["topic1", ...] or [],
-  "format": "testimonial" | "demo" | "comparison" | "overview" | "general",
-  "is_customer_story": true/false,
-  "reasoning": "Brief explanation"
-}}"""
-
     try:
-        response = openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a marketing content analyst for SchooLinks. Analyze video titles and generate appropriate tags. Be selective and accurate. Always respond with valid JSON only."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2,
-            max_tokens=500
-        )
-
-        content = response.choices[0].message.content
-        json_match = re.search(r'\{[\s\S]*\}', content)
-        if json_match:
-            return json.loads(json_match.group())
-        return {'error': 'Could not parse JSON response'}
+        response = create_chat_completion(**build_request(title, content_type, existing_tags))
+        return json.loads(response.choices[0].message.content)
 
     except Exception as e:
         return {'error': str(e)}
 
 
-def update_video_tags(conn, record_id: int, analysis: Dict):
-    """Update video record with new tags."""
-    auto_tags = analysis.get('auto_tags', [])
+def classify_title_rules(title: str) -> Tuple[Dict[str, Any], str]:
+    """Tag a title with the keyword rules.
 
-    if not auto_tags:
-        return False
+    Returns (analysis, confidence). The analysis has the same JSON shape as
+    analyze_title_with_ai; confidence is 'high' when at least two categories
+    (competitor, persona, topic, format) matched for 3+ tags, else 'low'.
+    """
+    lowered = (title or '').lower()
 
-    # Build tag string
-    tags_str = ', '.join(auto_tags)
+    matched = [[], [], []]
+    for phrase in KEYWORD_RE.findall(lowered):
+        category, tag = KEYWORD_CATEGORIES[phrase]
+        if tag not in matched[category]:
+            matched[category].append(tag)
+    competitors, personas, topics = matched
 
-    with conn.cursor() as cur:
-        cur.execute("""
-            UPDATE marketing_content
-            SET auto_tags = COALESCE(auto_tags, '') ||
-                CASE WHEN COALESCE(auto_tags, '') = '' THEN %s
-                     ELSE ', ' || %s END,
-                content_analyzed_at = %s
-            WHERE id = %s
-        """, (tags_str, tags_str, datetime.utcnow(), record_id))
-        conn.commit()
-        return True
+    format_type = next((fmt for pattern, fmt in FORMAT_RULES if pattern.search(lowered)), 'general')
+
+    auto_tags = competitors + personas + topics
+    if format_type != 'general':
+        auto_tags.append(format_type)
+
+    categories = sum(1 for found in matched if found) + (format_type != 'general')
+    confidence = 'high' if categories >= 2 and len(auto_tags) >= 3 else 'low'
+
+    return {
+        'auto_tags': auto_tags,
+        'competitors_mentioned': competitors,
+        'personas': personas,
+        'topics': topics,
+        'format': format_type,
+        'is_customer_story': format_type == 'testimonial',
+        'reasoning': 'Keyword rules' if auto_tags else 'No keyword matches',
+    }, confidence
+
+
+def merge_tags(existing: Optional[str], new_tags: List[str]) -> str:
+    """Append new tags to the record's current auto_tags string, skipping ones it already has.
 
-    return False
+    Short rule results (e.g. 'FAFSA') still pass the LENGTH(auto_tags) < 10
+    filter, so reruns see the same video and tags again.
+    """
+    present = {tag.strip().lower() for tag in (existing or '').split(',')}
+    added = [tag for tag in dict.fromkeys(new_tags) if tag.lower() not in present]
+    if not added:
+        return existing or ''
+    tags_str = ', '.join(added)
+    return f"{existing}, {tags_str}" if existing else tags_str
+
+
+def flush_updates(conn, pending: List[tuple]):
+    """Write buffered (id, auto_tags) results in one statement and one commit."""
+    analyzed_at = datetime.now(timezone.utc)
+    with conn.cursor() as cur:
+        execute_values(cur, """
+            UPDATE marketing_content AS m
+            SET auto_tags = v.auto_tags,
+                content_analyzed_at = v.analyzed_at
+            FROM (VALUES %s) AS v(id, auto_tags, analyzed_at)
+            WHERE m.id = v.id::uuid
+        """, [values + (analyzed_at,) for values in pending], template="(%s, %s, %s)")
+    conn.commit()
+    print(f"  Saved {len(pending)} records")
+    pending.clear()
 
 
 def main():
     parser = argparse.ArgumentParser(description='Enrich video tags from titles')
-    parser.add_argument('--dry-run', action='store_true', help='Preview without making changes')
-    parser.add_argument('--limit', type=int, default=0, help='Limit number of records to process')
     parser.add_argument('--all', action='store_true', help='Process all videos without transcripts')
+    add_common_arguments(parser)
+    parser.add_argument('--llm-fallback', action='store_true',
+                        help='Ask AI about titles the keyword rules cannot tag confidently')
     args = parser.parse_args()
+    # A Batch API job only makes sense for the titles the rules can't settle
+    use_llm = args.llm_fallback or args.batch or bool(args.collect_batch)
+
+    if args.batch and args.dry_run:
+        parser.error('--batch submits paid requests; it cannot be combined with --dry-run')
 
     print("=" * 60)
     print("Video Tag Enrichment (Title Analysis)")
@@ -186,79 +382,156 @@ def main():
         print("ERROR: DATABASE_URL not set")
         sys.exit(1)
 
-    if not OPENAI_API_KEY:
+    if use_llm and not OPENAI_API_KEY:
         print("ERROR: OPENAI_API_KEY not set")
         sys.exit(1)
 
+    init_db_pool()
     conn = get_db_connection()
     print("✓ Connected to database")
 
     # Get videos without transcripts that need better tagging
+    columns = "id, title, type, tags, auto_tags, state"
     with conn.cursor() as cur:
-        query = """
-            SELECT id, title, type, tags, auto_tags, state
-            FROM marketing_content
-            WHERE (type = 'Video' OR type = 'Video Clip')
-              AND (extracted_text IS NULL OR LENGTH(extracted_text) < 100)
-              AND (auto_tags IS NULL OR LENGTH(auto_tags) < 10)
-            ORDER BY last_updated DESC
-        """
-
-        if args.limit > 0:
-            query += f" LIMIT {args.limit}"
-
-        cur.execute(query)
-        videos = cur.fetchall()
-
-    print(f"Found {len(videos)} videos to process")
-
-    if not videos:
-        print("No videos need processing")
-        conn.close()
-        return
+        if args.collect_batch:
+            # The videos that were submitted, whether or not they still match the filters
+            responses = fetch_batch_results(args.collect_batch)
+            query = f"""
+                SELECT {columns}
+                FROM marketing_content
+                WHERE id = ANY(%s::uuid[])
+            """
+            params = (list(responses),)
+            if args.limit > 0:
+                query += f" LIMIT {args.limit}"
+        else:
+            where = """type IN ('Video', 'Video Clip')
+                  AND (extracted_text IS NULL OR LENGTH(extracted_text) < 100)
+                  AND (auto_tags IS NULL OR LENGTH(auto_tags) < 10)"""
+            # Dry runs only look, so they don't claim rows away from real runs
+            query, params = candidate_query('video_tags', columns, where, args.limit, claim=not args.dry_run)
 
-    # Process each video
-    updated = 0
-    skipped = 0
-    errors = 0
+        cur.execute(query, params)
+        videos = cur.fetchall()
+    conn.commit()
 
-    for i, video in enumerate(videos, 1):
-        title = video['title'][:50]
-        print(f"\n[{i}/{len(videos)}] {title}...")
+    # Claims are released when the run ends, failed or not
+    claiming = not args.dry_run and not args.collect_batch
 
-        analysis = analyze_title_with_ai(
-            video['title'],
-            video['type'],
-            video.get('tags', '')
+    try:
+        print(f"Found {len(videos)} videos to process")
+
+        if not videos:
+            print("No videos need processing")
+            return
+
+        # Process each video
+        updated = 0
+        skipped = 0
+        errors = 0
+
+        # Keyword rules first. With --llm-fallback only confident rule results are
+        # final and the rest go to the cache / AI; without it, any tags found are used.
+        # At ~20µs a title this stays on the main thread: it finishes long before
+        # the first API response would arrive.
+        ruled = {}
+        settled = set()
+        for video in videos:
+            ruled[video['id']], confidence = classify_title_rules(video['title'])
+            if confidence == 'high' or (not use_llm and ruled[video['id']]['auto_tags']):
+                settled.add(video['id'])
+        unresolved = [video for video in videos if video['id'] not in settled]
+        print(f"  {len(settled)} tagged by keyword rules")
+
+        cached, misses = (
+            load_cached_analyses(conn, unresolved) if unresolved and use_llm and not args.no_cache else ({}, {})
         )
-
-        if 'error' in analysis:
-            print(f"  ✗ AI error: {analysis['error']}")
-            errors += 1
-            continue
-
-        auto_tags = analysis.get('auto_tags', [])
-        competitors = analysis.get('competitors_mentioned', [])
-        format_type = analysis.get('format', 'general')
-        reasoning = analysis.get('reasoning', '')[:60]
-
-        if auto_tags:
-            print(f"  → Tags: {', '.join(auto_tags[:5])}{'...' if len(auto_tags) > 5 else ''}")
-            if competitors:
-                print(f"    Competitors: {', '.join(competitors)}")
-            print(f"    Format: {format_type} | {reasoning}")
-
-            if not args.dry_run:
-                update_video_tags(conn, video['id'], analysis)
-            updated += 1
-        else:
-            print(f"  → No tags generated")
-            skipped += 1
-
-        # Rate limit
-        time.sleep(0.3)
-
-    conn.close()
+        print(f"  {len(cached)} cached analyses reused")
+        new_cache_rows = []
+        pending = []
+
+        # AI calls run in worker threads; this thread prints results and hands
+        # full batches to the writer threads
+        flushes = []
+        with ThreadPoolExecutor(max_workers=args.workers) as executor, \
+                ThreadPoolExecutor(max_workers=FLUSH_WRITERS) as writer:
+            uncached = [video for video in unresolved if video['id'] not in cached]
+            if not use_llm:
+                fresh = [(video, ruled[video['id']]) for video in uncached]
+            elif args.collect_batch:
+                fresh = [
+                    (video, responses.get(str(video['id']), {'error': 'No result in batch output'}))
+                    for video in uncached
+                ]
+            elif args.batch:
+                fresh = []
+                if uncached:
+                    batch_id = submit_batch_requests({
+                        str(video['id']): build_request(video['title'], video['type'], video.get('tags', ''))
+                        for video in uncached
+                    }, 'video_tags')
+                    print(f"\nSubmitted batch {batch_id} with {len(uncached)} videos")
+                    print(f"  Collect later with: python enrich_video_tags.py --collect-batch {batch_id}")
+            else:
+                futures = {
+                    executor.submit(analyze_title_with_ai, video['title'], video['type'], video.get('tags', '')): video
+                    for video in uncached
+                }
+                fresh = ((futures[future], future.result()) for future in as_completed(futures))
+            results = chain(
+                ((video, ruled[video['id']]) for video in videos if video['id'] in settled),
+                ((video, cached[video['id']]) for video in unresolved if video['id'] in cached),
+                fresh,
+            )
+
+            for i, (video, analysis) in enumerate(results, 1):
+                if len(pending) >= FLUSH_EVERY:
+                    flushes.append(submit_flush(writer, flush_updates, pending))
+
+                title = video['title'][:50]
+                print(f"\n[{i}/{len(videos)}] {title}...")
+
+                if 'error' in analysis:
+                    print(f"  ✗ AI error: {analysis['error']}")
+                    errors += 1
+                    continue
+
+                if video['id'] in misses:
+                    new_cache_rows.append(misses[video['id']] + (analysis,))
+
+                auto_tags = analysis.get('auto_tags', [])
+                competitors = analysis.get('competitors_mentioned', [])
+                format_type = analysis.get('format', 'general')
+                reasoning = analysis.get('reasoning', '')[:60]
+
+                if auto_tags:
+                    print(f"  → Tags: {', '.join(auto_tags[:5])}{'...' if len(auto_tags) > 5 else ''}")
+                    if competitors:
+                        print(f"    Competitors: {', '.join(competitors)}")
+                    print(f"    Format: {format_type} | {reasoning}")
+
+                    if not args.dry_run:
+                        # Existing auto_tags came with the SELECT, so merge here instead of in SQL
+                        pending.append((video['id'], merge_tags(video.get('auto_tags'), auto_tags)))
+                    updated += 1
+                else:
+                    print(f"  → No tags generated")
+                    skipped += 1
+
+            if pending:
+                flushes.append(submit_flush(writer, flush_updates, pending))
+
+        # Surface any write error now that every batch has finished
+        for flush in flushes:
+            flush.result()
+
+        if new_cache_rows and not args.dry_run:
+            store_cached_analyses(conn, new_cache_rows)
+    finally:
+        if claiming:
+            release_claims(conn, 'video_tags', [video['id'] for video in videos])
+        return_db_connection(conn)
+        close_db_pool()
 
     print("\n" + "=" * 60)
     print("ENRICHMENT COMPLETE")
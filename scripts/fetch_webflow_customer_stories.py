@@ -14,6 +14,7 @@ Usage:
     python scripts/fetch_webflow_customer_stories.py              # Full fetch
     python scripts/fetch_webflow_customer_stories.py --dry-run -v # Preview
     python scripts/fetch_webflow_customer_stories.py --output PATH  # Custom CSV
+    python scripts/fetch_webflow_customer_stories.py --no-cache   # Re-extract every story
 """
 
 import os
@@ -23,10 +24,15 @@ import json
 import re
 import time
 import argparse
+import functools
 from datetime import datetime
+from html.parser import HTMLParser
 from typing import Optional, Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import psycopg2
 from psycopg2.extras import RealDictCursor
 from dotenv import load_dotenv
@@ -44,10 +50,29 @@ RESOURCES_COLLECTION_ID = '6751db0aa481dcef9c9f387a'
 CUSTOMER_STORY_TYPE_ID = '675223f1c7d4029beaea5081'
 SCHOOLINKS_BASE_URL = 'https://www.schoolinks.com'
 
+_WS_RE = re.compile(r'\s+')
+
+# Collection pages fetched at once after the first one reports the item total
+PAGE_WORKERS = 4
+PAGE_LIMIT = 100
+
+# Shared HTTP session so Webflow API calls reuse keep-alive connections;
+# 429s are retried (honoring Retry-After) instead of pacing every request
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=PAGE_WORKERS, pool_maxsize=PAGE_WORKERS,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504]),
+))
+
 DEFAULT_OUTPUT_PATH = os.path.expanduser(
     f'~/Desktop/inbound-generator/data/reports/customer-stories/customer-stories-{datetime.now().strftime("%Y-%m-%d")}.csv'
 )
 
+# Topic map and extracted stories from earlier runs; a story is only
+# re-extracted when its lastPublished changes
+CACHE_PATH = os.path.expanduser('~/.cache/webflow_customer_stories.json')
+TOPIC_MAP_TTL_SECONDS = 24 * 60 * 60
+
 # CSV columns
 CSV_COLUMNS = [
     'webflow_id', 'name', 'slug', 'live_link', 'district_name', 'state',
@@ -57,6 +82,40 @@ CSV_COLUMNS = [
 ]
 
 
+class _TextExtractor(HTMLParser):
+    """Collects the stripped text nodes of an HTML fragment, skipping script/style."""
+
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ('script', 'style'):
+            self._skip += 1
+
+    def handle_endtag(self, tag):
+        if tag in ('script', 'style') and self._skip:
+            self._skip -= 1
+
+    def handle_data(self, data):
+        data = data.strip()
+        if data and not self._skip:
+            self.parts.append(data)
+
+
+def html_to_text(html: str) -> str:
+    """Plain text of an HTML fragment, whitespace collapsed.
+
+    Same output as BeautifulSoup's get_text(separator=' ', strip=True), but
+    streams through the stdlib parser without building a tree.
+    """
+    parser = _TextExtractor()
+    parser.feed(html)
+    parser.close()
+    return _WS_RE.sub(' ', ' '.join(parser.parts)).strip()
+
+
 def get_db_connection():
     """Create database connection."""
     if not DATABASE_URL:
@@ -71,40 +130,42 @@ def get_webflow_headers() -> Dict[str, str]:
     }
 
 
+def fetch_items_page(offset: int) -> Dict[str, Any]:
+    """Fetch one page of the resources collection (items plus pagination info)."""
+    url = (
+        f'https://api.webflow.com/v2/collections/{RESOURCES_COLLECTION_ID}/items'
+        f'?limit={PAGE_LIMIT}&offset={offset}'
+    )
+    response = _SESSION.get(url, headers=get_webflow_headers(), timeout=30)
+    response.raise_for_status()
+    return response.json()
+
+
 def fetch_all_customer_stories() -> List[Dict]:
     """Fetch all Customer Story items from Webflow resources collection."""
-    headers = get_webflow_headers()
-    all_items = []
-    offset = 0
-    limit = 100
-
     print(f'Fetching from Webflow collection {RESOURCES_COLLECTION_ID}...')
 
-    while True:
-        url = (
-            f'https://api.webflow.com/v2/collections/{RESOURCES_COLLECTION_ID}/items'
-            f'?limit={limit}&offset={offset}'
-        )
-        try:
-            response = requests.get(url, headers=headers, timeout=30)
-            response.raise_for_status()
-            data = response.json()
-            items = data.get('items', [])
-
-            if not items:
-                break
-
-            all_items.extend(items)
-            print(f'  Fetched {len(all_items)} items so far...')
-            offset += limit
-            time.sleep(0.3)
-
-            if len(items) < limit:
-                break
+    # The first page says how many items there are; the rest are fetched in parallel
+    try:
+        data = fetch_items_page(0)
+    except Exception as e:
+        print(f'ERROR fetching items at offset 0: {e}')
+        return []
+    all_items = data.get('items', [])
+    total = data.get('pagination', {}).get('total', len(all_items))
 
+    def fetch_page_items(offset: int) -> List[Dict]:
+        try:
+            return fetch_items_page(offset).get('items', [])
         except Exception as e:
             print(f'ERROR fetching items at offset {offset}: {e}')
-            break
+            return []
+
+    with ThreadPoolExecutor(max_workers=PAGE_WORKERS) as executor:
+        # map keeps collection order regardless of which page finishes first
+        for items in executor.map(fetch_page_items, range(PAGE_LIMIT, total, PAGE_LIMIT)):
+            all_items.extend(items)
+    print(f'  Fetched {len(all_items)} of {total} items')
 
     # Filter to Customer Stories only
     customer_stories = [
@@ -123,7 +184,7 @@ def get_topic_map() -> Dict[str, str]:
     topics = {}
     try:
         url = f'https://api.webflow.com/v2/collections/{RESOURCE_TOPICS_COLLECTION_ID}/items?limit=100'
-        response = requests.get(url, headers=headers, timeout=30)
+        response = _SESSION.get(url, headers=headers, timeout=30)
         response.raise_for_status()
         items = response.json().get('items', [])
         for item in items:
@@ -133,6 +194,65 @@ def get_topic_map() -> Dict[str, str]:
     return topics
 
 
+def load_cache() -> Dict[str, Any]:
+    """Load the local run cache (empty if missing or unreadable)."""
+    try:
+        with open(CACHE_PATH, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def save_cache(cache: Dict[str, Any]):
+    """Write the local run cache."""
+    os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+    with open(CACHE_PATH, 'w', encoding='utf-8') as f:
+        json.dump(cache, f)
+
+
+def load_topic_map(cache: Dict[str, Any]) -> Dict[str, str]:
+    """Topic map from the cache while it's under a day old, else from Webflow.
+
+    A changed map drops the cached stories, since their topic names came from it.
+    """
+    topic_map = cache.get('topic_map')
+    if topic_map is not None and time.time() - cache.get('topic_map_fetched_at', 0) < TOPIC_MAP_TTL_SECONDS:
+        return topic_map
+
+    fresh = get_topic_map()
+    if not fresh:
+        # Webflow unavailable — an expired map beats none
+        return topic_map or {}
+    if fresh != topic_map:
+        cache['stories'] = {}
+    cache['topic_map'] = fresh
+    cache['topic_map_fetched_at'] = time.time()
+    return fresh
+
+
+def extract_stories(items: List[Dict], topic_map: Dict[str, str], cache: Dict[str, Any]) -> List[Dict]:
+    """Extract every item's fields, reusing cached results for items unchanged since the last run."""
+    cached_stories = cache.get('stories', {})
+    current = {}
+    stories = []
+    reused = 0
+    for item in items:
+        webflow_id = item.get('id', '')
+        published = item.get('lastPublished') or ''
+        cached = cached_stories.get(webflow_id)
+        if published and cached and cached[0] == published:
+            story = cached[1]
+            reused += 1
+        else:
+            story = extract_story_fields(item, topic_map)
+        current[webflow_id] = [published, story]
+        stories.append(story)
+    # Stories no longer in the collection fall out of the cache
+    cache['stories'] = current
+    print(f'  {len(stories) - reused} extracted, {reused} unchanged since last run')
+    return stories
+
+
 def extract_story_fields(item: Dict, topic_map: Dict[str, str]) -> Dict[str, Any]:
     """Extract and normalize fields from a Webflow CMS item.
 
@@ -190,14 +310,7 @@ def extract_story_fields(item: Dict, topic_map: Dict[str, str]) -> Dict[str, Any
     body_html = fd.get('body', '') or ''
     if isinstance(body_html, dict):
         body_html = ''  # unexpected format — skip
-    if body_html:
-        from bs4 import BeautifulSoup as _BS
-        import re as _re
-        _soup = _BS(body_html, 'html.parser')
-        body_text = _soup.get_text(separator=' ', strip=True)
-        body_text = _re.sub(r'\s+', ' ', body_text).strip()
-    else:
-        body_text = ''
+    body_text = html_to_text(body_html) if body_html else ''
 
     # Metrics from Webflow
     schools_count = fd.get('cs-schools-number', '') or ''
@@ -229,29 +342,49 @@ def extract_story_fields(item: Dict, topic_map: Dict[str, str]) -> Dict[str, Any
     }
 
 
+@functools.cache
+def _norm_url(url: str) -> str:
+    """URL as matched against the DB (same as lower(rtrim(live_link, '/')))."""
+    return url.lower().rstrip('/')
+
+
+@functools.cache
+def _norm_title(title: str) -> str:
+    """Title as matched against the DB (same as lower(trim(title)))."""
+    return title.lower().strip()
+
+
 def match_to_db(conn, stories: List[Dict], verbose: bool) -> List[Dict]:
     """
     Match each story to an existing marketing_content record.
     Tries URL match first, then title match.
+
+    Postgres does the lookup in one query and returns only the Customer
+    Story rows whose normalized URL or title appears among the stories.
     """
+    urls = [_norm_url(s['live_link']) for s in stories if s['live_link']]
+    titles = [_norm_title(s['name']) for s in stories if s['name']]
+
     with conn.cursor() as cur:
         cur.execute("""
-            SELECT id, title, live_link, type
+            SELECT id,
+                   lower(rtrim(live_link, '/')) AS url_norm,
+                   lower(trim(title)) AS title_norm
             FROM marketing_content
             WHERE type = 'Customer Story'
+              AND (lower(rtrim(live_link, '/')) = ANY(%s) OR lower(trim(title)) = ANY(%s))
             ORDER BY last_updated DESC
-        """)
+        """, (urls, titles))
         db_records = cur.fetchall()
 
     # Build lookup indices
     url_to_id = {}
     title_to_id = {}
     for rec in db_records:
-        if rec['live_link']:
-            url_norm = rec['live_link'].lower().rstrip('/')
-            url_to_id[url_norm] = str(rec['id'])
-        if rec['title']:
-            title_to_id[rec['title'].lower().strip()] = str(rec['id'])
+        if rec['url_norm']:
+            url_to_id[rec['url_norm']] = str(rec['id'])
+        if rec['title_norm']:
+            title_to_id[rec['title_norm']] = str(rec['id'])
 
     matched = 0
     unmatched = 0
@@ -262,14 +395,14 @@ def match_to_db(conn, stories: List[Dict], verbose: bool) -> List[Dict]:
 
         # Try URL match
         if story['live_link']:
-            url_norm = story['live_link'].lower().rstrip('/')
+            url_norm = _norm_url(story['live_link'])
             if url_norm in url_to_id:
                 marketing_content_id = url_to_id[url_norm]
                 match_status = 'url_match'
 
         # Try title match
         if not marketing_content_id and story['name']:
-            title_norm = story['name'].lower().strip()
+            title_norm = _norm_title(story['name'])
             if title_norm in title_to_id:
                 marketing_content_id = title_to_id[title_norm]
                 match_status = 'title_match'
@@ -295,10 +428,10 @@ def save_csv(stories: List[Dict], output_path: str, verbose: bool):
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
     with open(output_path, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS, extrasaction='ignore')
+        # Extra keys (raw_fields) are dropped and missing ones written empty
+        writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS, extrasaction='ignore', restval='')
         writer.writeheader()
-        for story in stories:
-            writer.writerow({k: story.get(k, '') for k in CSV_COLUMNS})
+        writer.writerows(stories)
 
     print(f'  Saved {len(stories)} rows to {output_path}')
 
@@ -328,6 +461,8 @@ def main():
                         help=f'CSV output path (default: {DEFAULT_OUTPUT_PATH})')
     parser.add_argument('-v', '--verbose', action='store_true',
                         help='Show detailed output')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Ignore cached topic map and story fields from earlier runs')
     parser.add_argument('--fields', action='store_true',
                         help='Print raw Webflow field keys for first 3 stories (for debugging)')
     args = parser.parse_args()
@@ -351,13 +486,17 @@ def main():
 
     # Step 2: Load topic map
     print('Loading topic map...')
-    topic_map = get_topic_map()
+    cache = {} if args.no_cache else load_cache()
+    topic_map = load_topic_map(cache)
     print(f'  {len(topic_map)} topics loaded')
     print()
 
     # Step 3: Extract fields
     print('Extracting fields...')
-    stories = [extract_story_fields(item, topic_map) for item in stories_raw]
+    stories = extract_stories(stories_raw, topic_map, cache)
+    # Saved before DB matching adds per-run match fields to the story dicts
+    if not args.dry_run:
+        save_cache(cache)
 
     # Show field debug info if requested
     if args.fields:
@@ -15,9 +15,10 @@ import os
 import sys
 import re
 import argparse
+import functools
 
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 from dotenv import load_dotenv
 
 # Load environment variables from multiple locations
@@ -27,11 +28,14 @@ for env_path in ['.env', '.env.local', 'scripts/.env', 'frontend/.env']:
 DATABASE_URL = os.getenv('DATABASE_URL')
 
 
+@functools.cache
 def clean_pg_array_tags(value: str) -> str:
     """Convert PostgreSQL array literal to clean comma-separated string.
 
     {counselors, "career exploration", eBook} -> counselors, career exploration, eBook
     {} -> None
+
+    Cached: many records carry the same tag string.
     """
     if not value or value.strip() == '{}':
         return None
@@ -42,25 +46,20 @@ def clean_pg_array_tags(value: str) -> str:
         inner = inner[1:-1]
 
     # Parse the comma-separated values, respecting quoted strings
-    tags = []
-    current = ''
-    in_quotes = False
-
-    for char in inner:
-        if char == '"':
-            in_quotes = not in_quotes
-        elif char == ',' and not in_quotes:
-            tag = current.strip().strip('"').strip()
-            if tag:
-                tags.append(tag)
-            current = ''
-        else:
-            current += char
-
-    # Don't forget the last tag
-    tag = current.strip().strip('"').strip()
-    if tag:
-        tags.append(tag)
+    if '"' not in inner:
+        parts = inner.split(',')
+    else:
+        # Splitting on quotes leaves quoted text at odd indices; only the commas
+        # in the even (unquoted) segments separate tags
+        parts = ['']
+        for i, segment in enumerate(inner.split('"')):
+            if i % 2:
+                parts[-1] += segment
+            else:
+                first, *rest = segment.split(',')
+                parts[-1] += first
+                parts.extend(rest)
+    tags = [tag for tag in (part.strip() for part in parts) if tag]
 
     if not tags:
         return None
@@ -68,6 +67,23 @@ def clean_pg_array_tags(value: str) -> str:
     return ', '.join(tags)
 
 
+def clean_tags_sql(column: str) -> str:
+    """SQL expression doing clean_pg_array_tags server-side.
+
+    Postgres parses the array literal itself (quotes, escapes, whitespace);
+    {} becomes NULL and values that aren't array literals are left alone.
+    Raises a DataError if a value looks like an array literal but isn't valid.
+    """
+    return f"CASE WHEN {column} LIKE '{{%}}' THEN NULLIF(array_to_string({column}::text[], ', '), '') ELSE {column} END"
+
+
+# Matches the partial index idx_marketing_content_array_tags
+AFFECTED_FILTER = "tags LIKE '{%}' OR auto_tags LIKE '{%}'"
+
+# Rows per round-trip when streaming records for the Python fallback
+FETCH_SIZE = 500
+
+
 def main():
     parser = argparse.ArgumentParser(description='Fix PostgreSQL array tag format')
     parser.add_argument('--dry-run', action='store_true', help='Preview without making changes')
@@ -84,30 +100,62 @@ def main():
     conn = psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor)
     cur = conn.cursor()
 
-    # Find affected records
-    cur.execute("""
-        SELECT id, title, tags, auto_tags
-        FROM marketing_content
-        WHERE tags LIKE '{%%}' OR auto_tags LIKE '{%%}'
-        ORDER BY title
-    """)
-    rows = cur.fetchall()
-
-    print(f"\nFound {len(rows)} records with curly-brace tag format\n")
-
-    if not rows:
-        print("Nothing to fix!")
-        conn.close()
-        return
-
+    # Postgres rewrites the tags in place (--dry-run previews the same
+    # expressions); if a value isn't a valid array literal, fall back to
+    # fetching the records and cleaning them in Python
+    try:
+        if not args.dry_run:
+            cur.execute(f"""
+                UPDATE marketing_content
+                SET tags = {clean_tags_sql('tags')},
+                    auto_tags = {clean_tags_sql('auto_tags')}
+                WHERE {AFFECTED_FILTER}
+            """)
+            fixed = cur.rowcount
+            conn.commit()
+            conn.close()
+            print(f"\nFixed {fixed} records")
+            return
+
+        cur.execute(f"""
+            SELECT id, title, tags, auto_tags,
+                   {clean_tags_sql('tags')} AS new_tags,
+                   {clean_tags_sql('auto_tags')} AS new_auto
+            FROM marketing_content
+            WHERE {AFFECTED_FILTER}
+            ORDER BY title
+        """)
+        rows = cur.fetchall()
+    except psycopg2.DataError as e:
+        conn.rollback()
+        print(f"\nPostgres could not parse every tag value ({str(e).strip()}); cleaning in Python")
+        # Server-side cursor, so the records stream in FETCH_SIZE chunks
+        rows = conn.cursor('affected_tags')
+        rows.itersize = FETCH_SIZE
+        rows.execute(f"""
+            SELECT id, title, tags, auto_tags
+            FROM marketing_content
+            WHERE {AFFECTED_FILTER}
+            ORDER BY title
+        """)
+
+    found = 0
     fixed = 0
+    # Distinct old -> new values per column; records share the same tag strings,
+    # so the UPDATEs send far fewer pairs than there are records
+    tag_fixes = {}
+    auto_fixes = {}
     for row in rows:
+        found += 1
         title = row['title'][:55]
         old_tags = row['tags']
         old_auto = row['auto_tags']
 
-        new_tags = clean_pg_array_tags(old_tags) if old_tags and old_tags.startswith('{') else old_tags
-        new_auto = clean_pg_array_tags(old_auto) if old_auto and old_auto.startswith('{') else old_auto
+        if 'new_tags' in row:
+            new_tags, new_auto = row['new_tags'], row['new_auto']
+        else:
+            new_tags = clean_pg_array_tags(old_tags) if old_tags and old_tags.startswith('{') else old_tags
+            new_auto = clean_pg_array_tags(old_auto) if old_auto and old_auto.startswith('{') else old_auto
 
         tags_changed = new_tags != old_tags
         auto_changed = new_auto != old_auto
@@ -123,16 +171,33 @@ def main():
             if auto_changed:
                 print(f"    auto_tags: {old_auto[:60]}")
                 print(f"           ->  {(new_auto or 'NULL')[:60]}")
-        else:
-            cur.execute("""
-                UPDATE marketing_content
-                SET tags = %s, auto_tags = %s
-                WHERE id = %s
-            """, (new_tags, new_auto, row['id']))
 
         fixed += 1
+        if tags_changed:
+            tag_fixes[old_tags] = new_tags
+        if auto_changed:
+            auto_fixes[old_auto] = new_auto
+
+    print(f"\nFound {found} records with curly-brace tag format")
+
+    if not found:
+        print("Nothing to fix!")
+        conn.close()
+        return
 
-    if not args.dry_run:
+    if not args.dry_run and fixed:
+        # One UPDATE ... FROM (VALUES ...) per column rewrites every record holding
+        # each old value; the affected filter (with % escaped for execute_values)
+        # keeps the lookup on the partial index
+        affected = AFFECTED_FILTER.replace('%', '%%')
+        for column, fixes in (('tags', tag_fixes), ('auto_tags', auto_fixes)):
+            if fixes:
+                execute_values(cur, f"""
+                    UPDATE marketing_content AS m
+                    SET {column} = v.new_value
+                    FROM (VALUES %s) AS v(old_value, new_value)
+                    WHERE ({affected}) AND m.{column} = v.old_value
+                """, list(fixes.items()), page_size=500)
         conn.commit()
 
     conn.close()
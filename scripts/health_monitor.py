@@ -20,17 +20,20 @@ Usage:
     python scripts/health_monitor.py --skip-ai               # Rule-based only
     python scripts/health_monitor.py --output report.json
     python scripts/health_monitor.py --dry-run -v
+    python scripts/health_monitor.py --cache-ttl 300       # Reuse a report under 5 min old (alerting loops)
 """
 
 import os
 import sys
 import json
 import argparse
+import hashlib
 import time
 from datetime import datetime, timedelta
 from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
 
-import psycopg2
+from psycopg2 import pool
 from psycopg2.extras import RealDictCursor
 from dotenv import load_dotenv
 
@@ -45,6 +48,9 @@ OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 
 AI_MODEL = 'gpt-4o-mini'
 
+# Last report, reused by reruns within --cache-ttl (alerting loops poll often)
+REPORT_CACHE_PATH = os.path.expanduser('~/.cache/health_report.json')
+
 
 class DecimalEncoder(json.JSONEncoder):
     """JSON encoder that handles Decimal types."""
@@ -58,38 +64,58 @@ class DecimalEncoder(json.JSONEncoder):
         return super().default(obj)
 
 
+# Connection pool
+db_pool = None
+
+
+def init_db_pool(min_conn=1, max_conn=4):
+    """Initialize database connection pool."""
+    global db_pool
+    db_pool = pool.ThreadedConnectionPool(min_conn, max_conn, DATABASE_URL, cursor_factory=RealDictCursor)
+
+
 def get_db_connection():
-    """Create a database connection."""
-    return psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor)
+    """Get a connection from the pool."""
+    return db_pool.getconn()
+
+
+def return_db_connection(conn):
+    """Return a connection to the pool."""
+    db_pool.putconn(conn)
+
+
+def run_db_step(step, *args):
+    """Run a step on its own pooled connection (connections aren't shared across threads)."""
+    conn = get_db_connection()
+    try:
+        return step(conn, *args)
+    finally:
+        return_db_connection(conn)
 
 
 def step_query_quality(conn, baseline_days, threshold_zero_rate, verbose=False):
     """Step 1: Analyze search quality vs baseline."""
     with conn.cursor() as cur:
-        # Last 24h metrics
-        cur.execute("""
-            SELECT
-                COUNT(*) as total_queries,
-                COUNT(*) FILTER (WHERE recommendations_count = 0 OR recommendations_count IS NULL) as zero_result,
-                AVG(recommendations_count) as avg_recommendations,
-                COUNT(DISTINCT query) as unique_queries
-            FROM ai_prompt_logs
-            WHERE created_at > NOW() - INTERVAL '24 hours'
-        """)
-        current = cur.fetchone()
-
-        # Baseline metrics (rolling N-day average)
+        # Last 24h metrics and the rolling N-day baseline before them, in one
+        # pass over the baseline window
         cur.execute("""
             SELECT
-                COUNT(*) / GREATEST(%s, 1) as avg_daily_queries,
-                COUNT(*) FILTER (WHERE recommendations_count = 0 OR recommendations_count IS NULL)::float
-                    / GREATEST(COUNT(*), 1) * 100 as baseline_zero_rate,
-                AVG(recommendations_count) as baseline_avg_recommendations
-            FROM ai_prompt_logs
-            WHERE created_at > NOW() - INTERVAL '%s days'
-            AND created_at <= NOW() - INTERVAL '24 hours'
+                COUNT(*) FILTER (WHERE recent) as total_queries,
+                COUNT(*) FILTER (WHERE recent AND (recommendations_count = 0 OR recommendations_count IS NULL)) as zero_result,
+                AVG(recommendations_count) FILTER (WHERE recent) as avg_recommendations,
+                COUNT(DISTINCT query) FILTER (WHERE recent) as unique_queries,
+                COUNT(*) FILTER (WHERE NOT recent) / GREATEST(%s, 1) as avg_daily_queries,
+                COUNT(*) FILTER (WHERE NOT recent AND (recommendations_count = 0 OR recommendations_count IS NULL))::float
+                    / GREATEST(COUNT(*) FILTER (WHERE NOT recent), 1) * 100 as baseline_zero_rate,
+                AVG(recommendations_count) FILTER (WHERE NOT recent) as baseline_avg_recommendations
+            FROM (
+                SELECT query, recommendations_count,
+                       created_at > NOW() - INTERVAL '24 hours' as recent
+                FROM ai_prompt_logs
+                WHERE created_at > NOW() - GREATEST(%s, 1) * INTERVAL '1 day'
+            ) logs
         """, (baseline_days, baseline_days))
-        baseline = cur.fetchone()
+        current = baseline = cur.fetchone()
 
     total = current['total_queries'] or 0
     zero = current['zero_result'] or 0
@@ -138,29 +164,24 @@ def step_query_quality(conn, baseline_days, threshold_zero_rate, verbose=False):
 def step_content_freshness(conn, verbose=False):
     """Step 2: Check content freshness and errors."""
     with conn.cursor() as cur:
-        # Stale enrichment (>30 days old)
+        # All five counts in one pass over marketing_content
         cur.execute("""
-            SELECT COUNT(*) as cnt FROM marketing_content
-            WHERE deep_enriched_at IS NOT NULL
-            AND deep_enriched_at < NOW() - INTERVAL '30 days'
+            SELECT
+                COUNT(*) as total,
+                COUNT(*) FILTER (WHERE deep_enriched_at IS NOT NULL
+                                 AND deep_enriched_at < NOW() - INTERVAL '30 days') as stale_enriched,
+                COUNT(*) FILTER (WHERE deep_enriched_at IS NULL) as never_enriched,
+                COUNT(*) FILTER (WHERE extraction_error IS NOT NULL) as extraction_errors,
+                COUNT(*) FILTER (WHERE keywords IS NULL OR keywords = '[]'::jsonb) as missing_keywords
+            FROM marketing_content
         """)
-        stale_enriched = cur.fetchone()['cnt']
-
-        # Never enriched
-        cur.execute("SELECT COUNT(*) as cnt FROM marketing_content WHERE deep_enriched_at IS NULL")
-        never_enriched = cur.fetchone()['cnt']
+        counts = cur.fetchone()
 
-        # Extraction errors
-        cur.execute("SELECT COUNT(*) as cnt FROM marketing_content WHERE extraction_error IS NOT NULL")
-        extraction_errors = cur.fetchone()['cnt']
-
-        # Missing keywords
-        cur.execute("SELECT COUNT(*) as cnt FROM marketing_content WHERE keywords IS NULL OR keywords = '[]'::jsonb")
-        missing_keywords = cur.fetchone()['cnt']
-
-        # Total
-        cur.execute("SELECT COUNT(*) as cnt FROM marketing_content")
-        total = cur.fetchone()['cnt']
+    total = counts['total']
+    stale_enriched = counts['stale_enriched']
+    never_enriched = counts['never_enriched']
+    extraction_errors = counts['extraction_errors']
+    missing_keywords = counts['missing_keywords']
 
     issues = []
     if extraction_errors > 10:
@@ -184,14 +205,15 @@ def step_pipeline_status(conn, verbose=False):
     """Step 3: Check if scheduled pipelines have run recently."""
     with conn.cursor() as cur:
         # Check log_analysis_reports for recent entries
+        # Ages come from the database clock, whatever the column's timezone type
         cur.execute("""
-            SELECT report_type, MAX(created_at) as last_run
+            SELECT report_type, MAX(created_at) as last_run,
+                   EXTRACT(EPOCH FROM NOW() - MAX(created_at)) / 3600 as age_hours
             FROM log_analysis_reports
             GROUP BY report_type
         """)
-        pipeline_runs = {row['report_type']: row['last_run'] for row in cur.fetchall()}
+        pipeline_runs = {row['report_type']: row for row in cur.fetchall()}
 
-    now = datetime.now()
     issues = []
     pipelines = {}
 
@@ -202,20 +224,13 @@ def step_pipeline_status(conn, verbose=False):
     }
 
     for report_type, config in expected.items():
-        last_run = pipeline_runs.get(report_type)
-        if last_run:
-            # Handle timezone-aware datetime
-            if last_run.tzinfo is not None:
-                from datetime import timezone
-                now_aware = datetime.now(timezone.utc)
-                age_hours = (now_aware - last_run).total_seconds() / 3600
-            else:
-                age_hours = (now - last_run).total_seconds() / 3600
-
+        run = pipeline_runs.get(report_type)
+        if run:
+            age_hours = float(run['age_hours'])
             stale = age_hours > config['max_age_hours']
             pipelines[report_type] = {
                 'name': config['name'],
-                'last_run': last_run.isoformat(),
+                'last_run': run['last_run'].isoformat(),
                 'age_hours': round(age_hours, 1),
                 'stale': stale,
             }
@@ -272,7 +287,7 @@ def step_terminology_health(conn, verbose=False):
     }
 
 
-def step_ai_anomaly_detection(conn, metrics, skip_ai=False, verbose=False):
+def step_ai_anomaly_detection(metrics, skip_ai=False, verbose=False):
     """Step 5: Use AI to detect anomalies in metrics."""
     if skip_ai:
         return {'status': 'skipped', 'reason': '--skip-ai'}
@@ -283,7 +298,8 @@ def step_ai_anomaly_detection(conn, metrics, skip_ai=False, verbose=False):
     from openai import OpenAI
     client = OpenAI(api_key=OPENAI_API_KEY)
 
-    metrics_text = json.dumps(metrics, indent=2, cls=DecimalEncoder)
+    # Compact JSON: indentation only adds prompt tokens
+    metrics_text = json.dumps(metrics, separators=(',', ':'), cls=DecimalEncoder)
 
     prompt = f"""You are a system health monitor for a marketing content search portal (SchooLinks).
 
@@ -315,16 +331,16 @@ Focus on:
             ],
             temperature=0.3,
             max_tokens=1000,
+            response_format={"type": "json_object"},
         )
         content = response.choices[0].message.content
 
-        import re
-        json_match = re.search(r'\{[\s\S]*\}', content)
-        if json_match:
-            result = json.loads(json_match.group())
-            result['status'] = 'pass'
-            return result
-        return {'status': 'warn', 'issues': ['Could not parse AI response']}
+        try:
+            result = json.loads(content)
+        except json.JSONDecodeError:
+            return {'status': 'warn', 'issues': ['Could not parse AI response']}
+        result['status'] = 'pass'
+        return result
 
     except Exception as e:
         return {'status': 'warn', 'issues': [f'AI analysis failed: {str(e)[:200]}']}
@@ -393,35 +409,46 @@ def print_health_report(report, alert_mode=False):
             print(f"  [ALERT] {issue}")
 
 
-def main():
-    parser = argparse.ArgumentParser(description='System health and search quality monitoring agent')
-    parser.add_argument('--baseline-days', type=int, default=7, help='Days for baseline comparison (default: 7)')
-    parser.add_argument('--alert', action='store_true', help='Format output for alerting')
-    parser.add_argument('--skip-ai', action='store_true', help='Skip AI anomaly detection')
-    parser.add_argument('--threshold-zero-rate', type=float, default=0.15,
-                        help='Alert threshold for zero-result rate (default: 0.15 = 15%%)')
-    parser.add_argument('--output', type=str, help='Output file for JSON report')
-    parser.add_argument('--dry-run', action='store_true', help='Preview only')
-    parser.add_argument('-v', '--verbose', action='store_true', help='Verbose output')
+def load_cached_report(params, ttl_seconds):
+    """Last report if it is under ttl_seconds old and was run with the same params, else None."""
+    try:
+        if time.time() - os.path.getmtime(REPORT_CACHE_PATH) >= ttl_seconds:
+            return None
+        with open(REPORT_CACHE_PATH, encoding='utf-8') as f:
+            cached = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    return cached['report'] if cached.get('params') == params else None
 
-    args = parser.parse_args()
 
-    total_steps = 6
-    print("=" * 60)
-    print(f"System Health Monitor — baseline: {args.baseline_days} days")
-    print("=" * 60)
+def save_cached_report(params, report):
+    """Write the report for load_cached_report to serve to reruns."""
+    os.makedirs(os.path.dirname(REPORT_CACHE_PATH), exist_ok=True)
+    with open(REPORT_CACHE_PATH, 'w', encoding='utf-8') as f:
+        json.dump({'params': params, 'report': report}, f, cls=DecimalEncoder)
 
+
+def run_health_checks(args, total_steps):
+    """Steps 1-6: run every check and assemble the report."""
     if not DATABASE_URL:
         print("ERROR: DATABASE_URL not set")
         sys.exit(1)
 
-    conn = get_db_connection()
+    init_db_pool()
     all_issues = []
     step_results = []
 
+    # Steps 1-4 are independent queries, so they run at once, each on its own
+    # connection; the report below is still printed in step order
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        qc_future = executor.submit(run_db_step, step_query_quality, args.baseline_days, args.threshold_zero_rate, args.verbose)
+        cf_future = executor.submit(run_db_step, step_content_freshness, args.verbose)
+        ps_future = executor.submit(run_db_step, step_pipeline_status, args.verbose)
+        th_future = executor.submit(run_db_step, step_terminology_health, args.verbose)
+
     # Step 1: Query quality
     print(f"\n[1/{total_steps}] Checking search quality...")
-    qc = step_query_quality(conn, args.baseline_days, args.threshold_zero_rate, args.verbose)
+    qc = qc_future.result()
     step_results.append({'name': 'Query Quality', 'status': qc['status']})
     all_issues.extend(qc.get('issues', []))
     c = qc.get('current', {})
@@ -429,14 +456,14 @@ def main():
 
     # Step 2: Content freshness
     print(f"\n[2/{total_steps}] Checking content freshness...")
-    cf = step_content_freshness(conn, args.verbose)
+    cf = cf_future.result()
     step_results.append({'name': 'Content Freshness', 'status': cf['status']})
     all_issues.extend(cf.get('issues', []))
     print(f"  Records: {cf.get('total_records', 'N/A')}, Errors: {cf.get('extraction_errors', 'N/A')}")
 
     # Step 3: Pipeline status
     print(f"\n[3/{total_steps}] Checking pipeline status...")
-    ps = step_pipeline_status(conn, args.verbose)
+    ps = ps_future.result()
     step_results.append({'name': 'Pipeline Status', 'status': ps['status']})
     all_issues.extend(ps.get('issues', []))
     for ptype, pdata in ps.get('pipelines', {}).items():
@@ -444,11 +471,13 @@ def main():
 
     # Step 4: Terminology health
     print(f"\n[4/{total_steps}] Checking terminology health...")
-    th = step_terminology_health(conn, args.verbose)
+    th = th_future.result()
     step_results.append({'name': 'Terminology Health', 'status': th['status']})
     all_issues.extend(th.get('issues', []))
     print(f"  Total mappings: {th.get('total_mappings', 'N/A')}, Added (7d): {th.get('added_last_7d', 'N/A')}")
 
+    db_pool.closeall()
+
     # Step 5: AI anomaly detection
     print(f"\n[5/{total_steps}] AI anomaly detection...")
     collected_metrics = {
@@ -457,12 +486,10 @@ def main():
         'pipeline_status': ps,
         'terminology': th,
     }
-    ai = step_ai_anomaly_detection(conn, collected_metrics, args.skip_ai, args.verbose)
+    ai = step_ai_anomaly_detection(collected_metrics, args.skip_ai, args.verbose)
     step_results.append({'name': 'AI Anomaly Detection', 'status': ai.get('status', 'unknown')})
     print(f"  Status: {ai.get('status', 'unknown')}")
 
-    conn.close()
-
     # Step 6: Generate report
     print(f"\n[6/{total_steps}] Generating report...")
 
@@ -485,6 +512,45 @@ def main():
         'all_issues': all_issues,
     }
 
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='System health and search quality monitoring agent')
+    parser.add_argument('--baseline-days', type=int, default=7, help='Days for baseline comparison (default: 7)')
+    parser.add_argument('--alert', action='store_true', help='Format output for alerting')
+    parser.add_argument('--skip-ai', action='store_true', help='Skip AI anomaly detection')
+    parser.add_argument('--threshold-zero-rate', type=float, default=0.15,
+                        help='Alert threshold for zero-result rate (default: 0.15 = 15%%)')
+    parser.add_argument('--output', type=str, help='Output file for JSON report')
+    parser.add_argument('--dry-run', action='store_true', help='Preview only')
+    parser.add_argument('--cache-ttl', type=int, default=0,
+                        help='Reuse the last report if it is younger than this many seconds (default: 0 = always rerun)')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Verbose output')
+
+    args = parser.parse_args()
+
+    total_steps = 6
+    print("=" * 60)
+    print(f"System Health Monitor — baseline: {args.baseline_days} days")
+    print("=" * 60)
+
+    params = {
+        'baseline_days': args.baseline_days,
+        'threshold_zero_rate': args.threshold_zero_rate,
+        'skip_ai': args.skip_ai,
+        'output': args.output,
+        # Hashed so the connection string's password stays out of the cache file
+        'database': hashlib.sha256((DATABASE_URL or '').encode('utf-8')).hexdigest(),
+    }
+    report = load_cached_report(params, args.cache_ttl) if args.cache_ttl > 0 else None
+    if report:
+        print(f"\nUsing cached report from {report['timestamp']} (--cache-ttl {args.cache_ttl}s)")
+    else:
+        report = run_health_checks(args, total_steps)
+        if args.cache_ttl > 0:
+            save_cached_report(params, report)
+
     print_health_report(report, alert_mode=args.alert)
 
     # Save report
@@ -494,7 +560,7 @@ def main():
         print(f"\n  Report saved to {args.output}")
 
     # Exit code
-    if overall == 'critical':
+    if report['overall_status'] == 'critical':
         sys.exit(1)
     sys.exit(0)
 
@@ -2,16 +2,24 @@
 """
 Import Marketing Content from Excel to Supabase
 Reads the Excel file and imports all content from the "All Content - Data Lake" tab
+
+With DATABASE_URL set, rows are loaded straight into Postgres with one COPY
+(falling back to batched INSERTs if the COPY fails); otherwise they are
+inserted through the Supabase API in batches.
 """
 
 import os
+import io
+import csv
 import sys
 from pathlib import Path
 
 import pandas as pd
+import psycopg2
+from psycopg2.extras import execute_values
 from dotenv import load_dotenv
 from supabase import create_client, Client
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 
 # Load environment variables from .env file in the same directory as this script
 SCRIPT_DIR = Path(__file__).parent
@@ -21,13 +29,32 @@ load_dotenv(SCRIPT_DIR / '.env')
 EXCEL_FILE_PATH = SCRIPT_DIR.parent / 'Marketing Content Portal (4).xlsx'
 DATA_LAKE_SHEET = 'All Content - Data Lake'
 
+# Rows per Supabase API insert; gains flatten out past ~1000 rows per request,
+# and much larger payloads run into the API's request-size limit
+DEFAULT_BATCH_SIZE = 1000
+MAX_BATCH_SIZE = 5000
+
+# Direct Postgres connection; when set, rows are loaded with COPY instead of the REST API
+DATABASE_URL = os.environ.get('DATABASE_URL')
+
+# Imported text columns; the NOT NULL ones get '' instead of NULL when blank
+TEXT_COLUMNS = ['type', 'title', 'live_link', 'ungated_link', 'platform', 'summary', 'state', 'tags']
+REQUIRED_COLUMNS = {'type', 'title'}
+IMPORT_COLUMNS = TEXT_COLUMNS + ['last_updated']
+
+# NULL marker in the COPY stream (a bare empty CSV field loads as '')
+COPY_NULL = '\\N'
+
+# Rows per INSERT statement when COPY fails and rows are inserted instead
+INSERT_PAGE_SIZE = 1000
+
 def get_supabase_client() -> Client:
     """Initialize Supabase client from .env file"""
     url = os.environ.get("SUPABASE_URL")
     key = os.environ.get("SUPABASE_KEY")
 
     if not url or not key:
-        print("ERROR: SUPABASE_URL and SUPABASE_KEY not found")
+        print("ERROR: DATABASE_URL or SUPABASE_URL and SUPABASE_KEY not found")
         print(f"\nPlease create a .env file at: {SCRIPT_DIR / '.env'}")
         print("With the following contents:")
         print("  SUPABASE_URL=https://your-project.supabase.co")
@@ -36,13 +63,98 @@ def get_supabase_client() -> Client:
 
     return create_client(url, key)
 
+def copy_records(conn, records: List[Dict[str, Any]]) -> int:
+    """Load all records with a single COPY ... FROM STDIN (all or nothing)"""
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator='\n')
+    writer.writerows(
+        [COPY_NULL if record[col] is None else record[col] for col in IMPORT_COLUMNS]
+        for record in records
+    )
+    buf.seek(0)
+    
+    with conn.cursor() as cur:
+        cur.copy_expert(
+            f"COPY marketing_content ({', '.join(IMPORT_COLUMNS)}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')",
+            buf
+        )
+    return len(records)
+
+def normalize_column_name(name: Any) -> str:
+    """Excel header as a database column name ('Live Link' -> 'live_link')"""
+    return str(name).strip().replace(' ', '_').lower()
+
+def insert_halves(insert, batch: List[Dict[str, Any]], start: int) -> Tuple[int, int]:
+    """Retry a failed batch as two halves, splitting again whichever half fails; returns (successful, failed)
+
+    A few bad rows in a large batch cost about log2(len(batch)) extra inserts
+    each instead of one insert per row. `start` is the batch's first row number.
+    """
+    successful = 0
+    failed = 0
+    mid = len(batch) // 2
+    
+    for offset, half in ((0, batch[:mid]), (mid, batch[mid:])):
+        try:
+            insert(half)
+            successful += len(half)
+        except Exception as e:
+            if len(half) == 1:
+                failed += 1
+                print(f"    ✗ Row {start + offset} failed: {e}")
+            else:
+                half_successful, half_failed = insert_halves(insert, half, start + offset)
+                successful += half_successful
+                failed += half_failed
+    
+    return successful, failed
+
+def insert_pages(conn, records: List[Dict[str, Any]], page_size: int = INSERT_PAGE_SIZE) -> Tuple[int, int]:
+    """Insert records with execute_values, each insert under its own savepoint; returns (successful, failed)
+
+    A failing page is rolled back on its own and split down to its bad rows,
+    so everything else still imports.
+    """
+    sql = f"INSERT INTO marketing_content ({', '.join(IMPORT_COLUMNS)}) VALUES %s"
+    template = f"({', '.join(f'%({col})s' for col in IMPORT_COLUMNS)})"
+    successful = 0
+    failed = 0
+    
+    with conn.cursor() as cur:
+        def insert(rows):
+            cur.execute("SAVEPOINT import_rows")
+            try:
+                execute_values(cur, sql, rows, template=template, page_size=page_size)
+            except psycopg2.Error:
+                cur.execute("ROLLBACK TO SAVEPOINT import_rows")
+                raise
+            cur.execute("RELEASE SAVEPOINT import_rows")
+        
+        for i in range(0, len(records), page_size):
+            page = records[i:i+page_size]
+            try:
+                insert(page)
+                successful += len(page)
+                print(f"  ✓ Rows {i}-{i + len(page) - 1}: {len(page)} rows imported")
+            except psycopg2.Error as e:
+                print(f"  ✗ Rows {i}-{i + len(page) - 1} failed: {e}")
+                if len(page) == 1:
+                    failed += 1
+                    continue
+                print("    Splitting failed page to isolate bad rows...")
+                page_successful, page_failed = insert_halves(insert, page, i)
+                successful += page_successful
+                failed += page_failed
+    
+    return successful, failed
+
 def clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     """Clean and prepare dataframe for import"""
     # Replace NaN/NaT with None for proper NULL handling
     df = df.where(pd.notnull(df), None)
     
     # Clean column names to match database schema
-    df.columns = [col.strip().replace(' ', '_').lower() for col in df.columns]
+    df.columns = [normalize_column_name(col) for col in df.columns]
     
     # Rename columns to match schema
     column_mapping = {
@@ -51,40 +163,89 @@ def clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     }
     df = df.rename(columns=column_mapping)
     
+    # Coerce whole columns instead of converting cell by cell: text columns to
+    # strings, last_updated to ISO timestamps, blanks to None
+    for col in TEXT_COLUMNS:
+        values = df[col].astype('string')
+        df[col] = values.astype(object).where(values.notna(), None)
+    last_updated = pd.to_datetime(df['last_updated'], errors='coerce')
+    df['last_updated'] = last_updated.dt.strftime('%Y-%m-%dT%H:%M:%S').astype(object).where(last_updated.notna(), None)
+    
     return df
 
-def convert_row_to_dict(row: pd.Series) -> Dict[str, Any]:
-    """Convert a pandas row to a dictionary for Supabase"""
-    data = {
-        'type': str(row['type']) if row['type'] is not None else '',
-        'title': str(row['title']) if row['title'] is not None else '',
-        'live_link': str(row['live_link']) if row['live_link'] is not None else None,
-        'ungated_link': str(row['ungated_link']) if row['ungated_link'] is not None else None,
-        'platform': str(row['platform']) if row['platform'] is not None else None,
-        'summary': str(row['summary']) if row['summary'] is not None else None,
-        'state': str(row['state']) if row['state'] is not None else None,
-        'tags': str(row['tags']) if row['tags'] is not None else None,
-        'last_updated': row['last_updated'].isoformat() if pd.notnull(row['last_updated']) else None
-    }
+def dataframe_to_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Convert the cleaned dataframe to insert-ready dictionaries for Supabase.
+
+    Blank type/title become '' (NOT NULL columns); other blanks stay NULL.
+    """
+    out = df[IMPORT_COLUMNS].copy()
+    for col in REQUIRED_COLUMNS:
+        out[col] = out[col].where(out[col].notna(), '')
+    return out.to_dict(orient='records')
+
+def insert_batches(supabase: Client, records: List[Dict[str, Any]], batch_size: int) -> Tuple[int, int]:
+    """Insert records through the Supabase API in batches; returns (successful, failed)"""
+    def insert(rows):
+        supabase.table('marketing_content').insert(rows).execute()
     
-    return data
+    total_rows = len(records)
+    successful = 0
+    failed = 0
+    
+    for i in range(0, total_rows, batch_size):
+        batch = records[i:i+batch_size]
+        batch_num = (i // batch_size) + 1
+        total_batches = (total_rows + batch_size - 1) // batch_size
+        
+        try:
+            # Insert batch
+            insert(batch)
+            
+            successful += len(batch)
+            print(f"  ✓ Batch {batch_num}/{total_batches}: {len(batch)} rows imported")
+            
+        except Exception as e:
+            print(f"  ✗ Batch {batch_num}/{total_batches} failed: {e}")
+            if len(batch) == 1:
+                failed += 1
+                continue
+            
+            # Split the failed batch until the bad rows are isolated
+            print("    Splitting failed batch to isolate bad rows...")
+            batch_successful, batch_failed = insert_halves(insert, batch, i)
+            successful += batch_successful
+            failed += batch_failed
+    
+    return successful, failed
 
-def import_data(batch_size: int = 100, clear_existing: bool = False):
+def import_data(batch_size: int = DEFAULT_BATCH_SIZE, clear_existing: bool = False):
     """Import data from Excel to Supabase"""
     
     print("=" * 70)
     print("Marketing Content Portal - Data Import")
     print("=" * 70)
     
-    # Initialize Supabase client
-    print("\n[1/6] Connecting to Supabase...")
-    supabase = get_supabase_client()
+    # Connect directly to Postgres when possible, else through the Supabase API
+    conn = None
+    supabase = None
+    if DATABASE_URL:
+        print("\n[1/6] Connecting to Postgres...")
+        conn = psycopg2.connect(DATABASE_URL)
+    else:
+        print("\n[1/6] Connecting to Supabase...")
+        supabase = get_supabase_client()
     print("✓ Connected successfully")
     
     # Read Excel file
     print(f"\n[2/6] Reading Excel file: {EXCEL_FILE_PATH}")
     try:
-        df = pd.read_excel(EXCEL_FILE_PATH, sheet_name=DATA_LAKE_SHEET)
+        # pandas already streams the sheet through openpyxl (read_only, data_only);
+        # usecols skips building the columns the import doesn't use
+        df = pd.read_excel(
+            EXCEL_FILE_PATH,
+            sheet_name=DATA_LAKE_SHEET,
+            usecols=lambda name: normalize_column_name(name) in IMPORT_COLUMNS
+        )
         print(f"✓ Loaded {len(df)} rows from '{DATA_LAKE_SHEET}' sheet")
     except Exception as e:
         print(f"✗ Error reading Excel file: {e}")
@@ -104,7 +265,13 @@ def import_data(batch_size: int = 100, clear_existing: bool = False):
         print(f"    • {content_type}: {count}")
     
     # Clear existing data if requested
-    if clear_existing:
+    if clear_existing and conn:
+        # Same transaction as the COPY, so a failed import keeps the old rows
+        print("\n[5/6] Clearing existing data...")
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM marketing_content")
+        print("✓ Existing data cleared (committed with the import)")
+    elif clear_existing:
         print("\n[5/6] Clearing existing data...")
         try:
             result = supabase.table('marketing_content').delete().neq('id', '00000000-0000-0000-0000-000000000000').execute()
@@ -114,42 +281,31 @@ def import_data(batch_size: int = 100, clear_existing: bool = False):
     else:
         print("\n[5/6] Skipping clear (keeping existing data)")
     
-    # Import data in batches
-    print(f"\n[6/6] Importing data to Supabase (batch size: {batch_size})...")
+    records = dataframe_to_records(df)
     
-    total_rows = len(df)
-    successful = 0
-    failed = 0
-    
-    for i in range(0, total_rows, batch_size):
-        batch = df.iloc[i:i+batch_size]
-        batch_num = (i // batch_size) + 1
-        total_batches = (total_rows + batch_size - 1) // batch_size
-        
+    if conn:
+        # Import data with one COPY
+        print("\n[6/6] Importing data with COPY...")
         try:
-            # Convert batch to list of dictionaries
-            records = [convert_row_to_dict(row) for _, row in batch.iterrows()]
-            
-            # Insert batch
-            result = supabase.table('marketing_content').insert(records).execute()
-            
-            successful += len(batch)
-            print(f"  ✓ Batch {batch_num}/{total_batches}: {len(batch)} rows imported")
-            
+            successful = copy_records(conn, records)
+            conn.commit()
+            failed = 0
+            print(f"  ✓ {successful} rows imported")
         except Exception as e:
-            failed += len(batch)
-            print(f"  ✗ Batch {batch_num}/{total_batches} failed: {e}")
-            
-            # Try individual inserts for failed batch
-            print(f"    Attempting individual inserts for failed batch...")
-            for idx, row in batch.iterrows():
-                try:
-                    record = convert_row_to_dict(row)
-                    supabase.table('marketing_content').insert(record).execute()
-                    successful += 1
-                    failed -= 1
-                except Exception as row_error:
-                    print(f"    ✗ Row {idx} failed: {row_error}")
+            conn.rollback()
+            print(f"  ✗ COPY failed: {e}")
+            print(f"  Retrying with INSERTs ({INSERT_PAGE_SIZE} rows per statement)...")
+            if clear_existing:
+                # The rollback undid the clear too
+                with conn.cursor() as cur:
+                    cur.execute("DELETE FROM marketing_content")
+            successful, failed = insert_pages(conn, records)
+            conn.commit()
+        conn.close()
+    else:
+        # Import data in batches
+        print(f"\n[6/6] Importing data to Supabase (batch size: {batch_size})...")
+        successful, failed = insert_batches(supabase, records, batch_size)
     
     # Final summary
     print("\n" + "=" * 70)
@@ -167,7 +323,8 @@ def main():
     import argparse
     
     parser = argparse.ArgumentParser(description='Import marketing content from Excel to Supabase')
-    parser.add_argument('--batch-size', type=int, default=100, help='Number of rows per batch (default: 100)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f'Rows per Supabase API batch (default: {DEFAULT_BATCH_SIZE}, max: {MAX_BATCH_SIZE})')
     parser.add_argument('--clear', action='store_true', help='Clear existing data before import')
     parser.add_argument('--excel-file', type=str, help='Path to Excel file (optional, uses default if not specified)')
     
@@ -179,7 +336,7 @@ def main():
         EXCEL_FILE_PATH = args.excel_file
     
     try:
-        import_data(batch_size=args.batch_size, clear_existing=args.clear)
+        import_data(batch_size=max(1, min(args.batch_size, MAX_BATCH_SIZE)), clear_existing=args.clear)
     except KeyboardInterrupt:
         print("\n\nImport cancelled by user")
         sys.exit(1)
@@ -27,6 +27,8 @@ Usage:
     python scripts/import_google_drive.py --enrich              # Run AI enrichment on imported content
     python scripts/import_google_drive.py --folder-id FOLDER_ID # Scan specific folder
     python scripts/import_google_drive.py --limit 20            # Process max 20 files
+    python scripts/import_google_drive.py --workers 4           # Process 4 files at a time (default: 8)
+    python scripts/import_google_drive.py --force               # Reprocess files unchanged since last import
 """
 
 import os
@@ -34,15 +36,20 @@ import sys
 import argparse
 import json
 import re
-import time
+import functools
+import threading
 from datetime import datetime
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Iterable, Tuple
 from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2 import pool
+from psycopg2.extras import RealDictCursor, execute_values
 from dotenv import load_dotenv
 
+from _rate_limiter import RateLimiter
+
 # Google API imports
 try:
     from google.oauth2 import service_account
@@ -93,6 +100,18 @@ MIME_TYPES = {
     'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet': 'xlsx',
 }
 
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+
+# Buffer this many finished files before writing them in one transaction
+FLUSH_EVERY = 50
+
+# Folders covered by one files.list query when walking the tree
+PARENTS_PER_QUERY = 50
+
+# Listing only returns folders and supported files; images, videos and other
+# unsupported files never leave Drive
+LISTED_MIME_FILTER = ' or '.join(f"mimeType = '{mime}'" for mime in [FOLDER_MIME_TYPE, *MIME_TYPES])
+
 # Content type detection from filename
 CONTENT_TYPE_PATTERNS = {
     '1-Pager': ['1-pager', 'one-pager', 'onepager', 'fact sheet', 'factsheet', 'datasheet',
@@ -104,17 +123,72 @@ CONTENT_TYPE_PATTERNS = {
     'Blog': ['blog', 'article', 'post'],
 }
 
+# One alternation per content type, checked in CONTENT_TYPE_PATTERNS order, so
+# a filename takes one scan per type instead of one per pattern
+CONTENT_TYPE_RES = [
+    (content_type, re.compile('|'.join(re.escape(pattern) for pattern in patterns)))
+    for content_type, patterns in CONTENT_TYPE_PATTERNS.items()
+]
+
 ENRICHMENT_MODEL = 'gpt-5.2'
-REQUEST_DELAY = 1
+# Shared across worker threads, so parallel enrichment stays under the API's
+# request limit without each worker sleeping after every call
+ENRICHMENT_RPM = 500
+
+# Binary downloads: one range request per 8 MiB (the client default is 100 KB),
+# and no chunking at all for files up to 1 MiB
+DOWNLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+SINGLE_REQUEST_MAX_BYTES = 1024 * 1024
+
+# Characters of extracted text kept per file
+MAX_EXTRACT_CHARS = 8000
+# PDF pages read at most
+MAX_PDF_PAGES = 15
+
+_WS_RE = re.compile(r'\s+')
+# File extension stripped from Drive names to get a title
+_EXT_RE = re.compile(r'\.(pdf|docx|pptx|xlsx)$', re.IGNORECASE)
+# Outermost JSON object in a model reply
+_JSON_RE = re.compile(r'\{[\s\S]*\}')
+
+rpm_limiter = RateLimiter(ENRICHMENT_RPM)
+
+
+# Connection pool (one connection per worker thread)
+db_pool = None
+
+# Process pool for CPU-bound PDF/DOCX parsing (created in main)
+parse_pool = None
+
+# Drive API clients aren't thread-safe, so each thread builds its own
+_drive_local = threading.local()
+
+
+def init_db_pool(min_conn=1, max_conn=8):
+    """Initialize database connection pool."""
+    global db_pool
+    db_pool = pool.ThreadedConnectionPool(min_conn, max_conn, DATABASE_URL, cursor_factory=RealDictCursor)
+
+
+def init_parse_pool(max_workers: Optional[int] = None):
+    """Initialize the PDF/DOCX parsing process pool (defaults to one process per core)."""
+    global parse_pool
+    parse_pool = ProcessPoolExecutor(max_workers=max_workers or os.cpu_count())
 
 
 def get_db_connection():
-    """Create a database connection."""
-    return psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor)
+    """Get a connection from the pool."""
+    return db_pool.getconn()
 
 
-def get_drive_service():
-    """Create Google Drive API service using service account."""
+def return_db_connection(conn):
+    """Return a connection to the pool."""
+    db_pool.putconn(conn)
+
+
+@functools.cache
+def get_drive_credentials():
+    """Load the service account credentials (shared by every thread's Drive client)."""
     if not GOOGLE_API_AVAILABLE:
         print("ERROR: google-api-python-client and google-auth not installed.")
         print("  pip install google-api-python-client google-auth")
@@ -130,10 +204,17 @@ def get_drive_service():
         sys.exit(1)
 
     scopes = ['https://www.googleapis.com/auth/drive.readonly']
-    credentials = service_account.Credentials.from_service_account_file(
+    return service_account.Credentials.from_service_account_file(
         GOOGLE_SERVICE_ACCOUNT_KEY_PATH, scopes=scopes
     )
-    return build('drive', 'v3', credentials=credentials)
+
+
+def get_drive_service():
+    """Google Drive API service for the calling thread, built on first use."""
+    service = getattr(_drive_local, 'service', None)
+    if service is None:
+        service = _drive_local.service = build('drive', 'v3', credentials=get_drive_credentials())
+    return service
 
 
 # =============================================================================
@@ -141,40 +222,50 @@ def get_drive_service():
 # =============================================================================
 
 def list_files_recursive(service, folder_id: str, verbose: bool = False) -> List[Dict]:
-    """List all files in a Google Drive folder recursively."""
-    all_files = []
+    """List all files in a Google Drive folder recursively.
 
-    # Query for files in this folder
-    query = f"'{folder_id}' in parents and trashed = false"
-    page_token = None
-
-    while True:
-        results = service.files().list(
-            q=query,
-            pageSize=100,
-            fields="nextPageToken, files(id, name, mimeType, modifiedTime, size, webViewLink)",
-            pageToken=page_token
-        ).execute()
-
-        items = results.get('files', [])
-
-        for item in items:
-            mime = item.get('mimeType', '')
-
-            # If it's a folder, recurse into it
-            if mime == 'application/vnd.google-apps.folder':
-                if verbose:
-                    print(f"    Scanning subfolder: {item['name']}/")
-                sub_files = list_files_recursive(service, item['id'], verbose)
-                all_files.extend(sub_files)
-            # If it's a supported file type, add it
-            elif mime in MIME_TYPES:
-                item['file_type'] = MIME_TYPES[mime]
-                all_files.append(item)
-
-        page_token = results.get('nextPageToken')
-        if not page_token:
-            break
+    Folders are walked breadth-first, and each files.list query covers up to
+    PARENTS_PER_QUERY folders at once ('a' in parents or 'b' in parents ...),
+    so a tree takes one request per batch of folders instead of one per folder.
+    """
+    all_files = []
+    frontier = [folder_id]
+    seen = {folder_id}
+
+    while frontier:
+        batch, frontier = frontier[:PARENTS_PER_QUERY], frontier[PARENTS_PER_QUERY:]
+        parents = ' or '.join(f"'{parent_id}' in parents" for parent_id in batch)
+        query = f"({parents}) and ({LISTED_MIME_FILTER}) and trashed = false"
+        page_token = None
+
+        while True:
+            results = service.files().list(
+                q=query,
+                pageSize=1000,
+                fields="nextPageToken, files(id, name, mimeType, modifiedTime, size, webViewLink)",
+                pageToken=page_token
+            ).execute()
+
+            items = results.get('files', [])
+
+            for item in items:
+                mime = item.get('mimeType', '')
+
+                # If it's a folder, queue it for the next batched query
+                if mime == FOLDER_MIME_TYPE:
+                    if item['id'] not in seen:
+                        if verbose:
+                            print(f"    Scanning subfolder: {item['name']}/")
+                        seen.add(item['id'])
+                        frontier.append(item['id'])
+                # If it's a supported file type, add it
+                elif mime in MIME_TYPES:
+                    item['file_type'] = MIME_TYPES[mime]
+                    all_files.append(item)
+
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                break
 
     return all_files
 
@@ -188,8 +279,8 @@ def extract_google_doc(service, file_id: str) -> Optional[str]:
     try:
         result = service.files().export(fileId=file_id, mimeType='text/plain').execute()
         text = result.decode('utf-8') if isinstance(result, bytes) else str(result)
-        text = re.sub(r'\s+', ' ', text).strip()
-        return text[:8000] if text else None
+        text = _WS_RE.sub(' ', text).strip()
+        return text[:MAX_EXTRACT_CHARS] if text else None
     except Exception as e:
         print(f"      Doc export error: {e}")
         return None
@@ -200,7 +291,7 @@ def extract_google_sheet(service, file_id: str) -> Optional[str]:
     try:
         result = service.files().export(fileId=file_id, mimeType='text/csv').execute()
         text = result.decode('utf-8') if isinstance(result, bytes) else str(result)
-        return text[:8000] if text else None
+        return text[:MAX_EXTRACT_CHARS] if text else None
     except Exception as e:
         print(f"      Sheet export error: {e}")
         return None
@@ -211,19 +302,25 @@ def extract_google_slides(service, file_id: str) -> Optional[str]:
     try:
         result = service.files().export(fileId=file_id, mimeType='text/plain').execute()
         text = result.decode('utf-8') if isinstance(result, bytes) else str(result)
-        text = re.sub(r'\s+', ' ', text).strip()
-        return text[:8000] if text else None
+        text = _WS_RE.sub(' ', text).strip()
+        return text[:MAX_EXTRACT_CHARS] if text else None
     except Exception as e:
         print(f"      Slides export error: {e}")
         return None
 
 
-def download_file_bytes(service, file_id: str) -> Optional[bytes]:
-    """Download a binary file from Google Drive."""
+def download_file_bytes(service, file_id: str, size: Optional[str] = None) -> Optional[bytes]:
+    """Download a binary file from Google Drive.
+
+    Files Drive reports as small come back in one request; larger ones are
+    fetched in DOWNLOAD_CHUNK_SIZE ranges.
+    """
     try:
         request = service.files().get_media(fileId=file_id)
+        if size is not None and int(size) <= SINGLE_REQUEST_MAX_BYTES:
+            return request.execute()
         buffer = BytesIO()
-        downloader = MediaIoBaseDownload(buffer, request)
+        downloader = MediaIoBaseDownload(buffer, request, chunksize=DOWNLOAD_CHUNK_SIZE)
         done = False
         while not done:
             _, done = downloader.next_chunk()
@@ -233,6 +330,25 @@ def download_file_bytes(service, file_id: str) -> Optional[bytes]:
         return None
 
 
+def join_text_capped(parts: Iterable[str], sep: str = '') -> Optional[str]:
+    """Join text pieces, collapse whitespace and cap at MAX_EXTRACT_CHARS.
+
+    Pieces are pulled only until the cap is sure to be filled, so a lazy
+    iterable skips the rest (e.g. PDF pages that would be cut off anyway).
+    Joining can merge one space per boundary, hence the len(kept) slack.
+    """
+    kept = []
+    total = 0
+    for part in parts:
+        part = _WS_RE.sub(' ', part)
+        kept.append(part)
+        total += len(part)
+        if total - len(kept) > MAX_EXTRACT_CHARS:
+            break
+    text = _WS_RE.sub(' ', sep.join(kept)).strip()
+    return text[:MAX_EXTRACT_CHARS] if text else None
+
+
 def extract_pdf_from_bytes(data: bytes) -> Optional[str]:
     """Extract text from PDF bytes."""
     if not PDF_AVAILABLE:
@@ -240,11 +356,7 @@ def extract_pdf_from_bytes(data: bytes) -> Optional[str]:
         return None
     try:
         reader = PdfReader(BytesIO(data))
-        text = ''
-        for page in reader.pages[:15]:
-            text += page.extract_text() or ''
-        text = re.sub(r'\s+', ' ', text).strip()
-        return text[:8000] if text else None
+        return join_text_capped((page.extract_text() or '') for page in reader.pages[:MAX_PDF_PAGES])
     except Exception as e:
         print(f"      PDF extraction error: {e}")
         return None
@@ -257,9 +369,7 @@ def extract_docx_from_bytes(data: bytes) -> Optional[str]:
         return None
     try:
         doc = docx.Document(BytesIO(data))
-        text = '\n'.join(para.text for para in doc.paragraphs)
-        text = re.sub(r'\s+', ' ', text).strip()
-        return text[:8000] if text else None
+        return join_text_capped((para.text for para in doc.paragraphs), sep='\n')
     except Exception as e:
         print(f"      DOCX extraction error: {e}")
         return None
@@ -276,12 +386,16 @@ def extract_content_from_drive_file(service, file_info: Dict) -> Optional[str]:
         return extract_google_sheet(service, file_id)
     elif file_type == 'google_slides':
         return extract_google_slides(service, file_id)
-    elif file_type == 'pdf':
-        data = download_file_bytes(service, file_id)
-        return extract_pdf_from_bytes(data) if data else None
-    elif file_type == 'docx':
-        data = download_file_bytes(service, file_id)
-        return extract_docx_from_bytes(data) if data else None
+    elif file_type in ('pdf', 'docx'):
+        data = download_file_bytes(service, file_id, file_info.get('size'))
+        if not data:
+            return None
+        extract = extract_pdf_from_bytes if file_type == 'pdf' else extract_docx_from_bytes
+        # Parsing is CPU-bound, so it runs in the process pool (off the GIL);
+        # other workers keep downloading meanwhile
+        if parse_pool:
+            return parse_pool.submit(extract, data).result()
+        return extract(data)
     else:
         return None
 
@@ -293,10 +407,9 @@ def extract_content_from_drive_file(service, file_info: Dict) -> Optional[str]:
 def detect_content_type_from_name(filename: str) -> str:
     """Detect marketing content type from filename."""
     name_lower = filename.lower()
-    for content_type, patterns in CONTENT_TYPE_PATTERNS.items():
-        for pattern in patterns:
-            if pattern in name_lower:
-                return content_type
+    for content_type, pattern_re in CONTENT_TYPE_RES:
+        if pattern_re.search(name_lower):
+            return content_type
     return 'Asset'
 
 
@@ -310,7 +423,7 @@ def find_matching_content(conn, title: str, drive_url: str) -> Optional[Dict]:
         # Try exact URL match first
         if drive_url:
             cur.execute("""
-                SELECT id, title, live_link, ungated_link, extracted_text
+                SELECT id, title, live_link, ungated_link, extracted_text, drive_file_id, drive_modified_at
                 FROM marketing_content
                 WHERE live_link = %s OR ungated_link = %s
                 LIMIT 1
@@ -320,10 +433,10 @@ def find_matching_content(conn, title: str, drive_url: str) -> Optional[Dict]:
                 return match
 
         # Try title match (fuzzy)
-        clean_title = re.sub(r'\.(pdf|docx|pptx|xlsx)$', '', title, flags=re.IGNORECASE).strip()
+        clean_title = _EXT_RE.sub('', title).strip()
         if len(clean_title) > 5:
             cur.execute("""
-                SELECT id, title, live_link, ungated_link, extracted_text
+                SELECT id, title, live_link, ungated_link, extracted_text, drive_file_id, drive_modified_at
                 FROM marketing_content
                 WHERE LOWER(title) ILIKE %s
                 LIMIT 1
@@ -335,6 +448,26 @@ def find_matching_content(conn, title: str, drive_url: str) -> Optional[Dict]:
     return None
 
 
+def drive_modified_time(file_info: Dict) -> Optional[datetime]:
+    """The file's Drive modifiedTime as an aware datetime, or None if missing."""
+    modified = file_info.get('modifiedTime')
+    return datetime.fromisoformat(modified.replace('Z', '+00:00')) if modified else None
+
+
+def is_unchanged_since_import(file_info: Dict, match: Dict) -> bool:
+    """True if this importer already wrote this file's current revision into the record.
+
+    Relies on drive_file_id / drive_modified_at, which only this script
+    writes, so records enriched by other pipelines or matched by title to
+    another file are still processed.
+    """
+    imported_at = match.get('drive_modified_at')
+    modified = drive_modified_time(file_info)
+    if match.get('drive_file_id') != file_info['id'] or not imported_at or not modified:
+        return False
+    return modified <= imported_at
+
+
 # =============================================================================
 # AI Enrichment
 # =============================================================================
@@ -379,10 +512,11 @@ Be selective with tags - only include what's actually in the content."""
             api_params["temperature"] = 0.3
             api_params["max_tokens"] = 1500
 
+        rpm_limiter.acquire()
         response = openai_client.chat.completions.create(**api_params)
 
         content = response.choices[0].message.content
-        json_match = re.search(r'\{[\s\S]*\}', content)
+        json_match = _JSON_RE.search(content)
         if json_match:
             return json.loads(json_match.group())
         return {}
@@ -395,6 +529,52 @@ Be selective with tags - only include what's actually in the content."""
 # Main Processing
 # =============================================================================
 
+def flush_writes(conn, updates: List[tuple], inserts: List[tuple]):
+    """Write buffered results: one UPDATE ... FROM (VALUES ...) and one multi-row INSERT, one commit."""
+    with conn.cursor() as cur:
+        if updates:
+            execute_values(cur, """
+                UPDATE marketing_content AS m
+                SET extracted_text = v.extracted_text,
+                    enhanced_summary = COALESCE(v.enhanced_summary, m.enhanced_summary),
+                    auto_tags = COALESCE(v.auto_tags, m.auto_tags),
+                    keywords = COALESCE(v.keywords::jsonb, m.keywords),
+                    deep_enriched_at = v.deep_enriched_at,
+                    drive_file_id = v.drive_file_id,
+                    drive_modified_at = v.drive_modified_at
+                FROM (VALUES %s) AS v(id, extracted_text, enhanced_summary, auto_tags, keywords, deep_enriched_at,
+                                      drive_file_id, drive_modified_at)
+                WHERE m.id = v.id::uuid
+            """, updates, template="(%s, %s, %s, %s, %s, %s::timestamp, %s, %s::timestamptz)")
+        if inserts:
+            execute_values(cur, """
+                INSERT INTO marketing_content
+                    (type, title, live_link, platform, summary, state, tags,
+                     enhanced_summary, auto_tags, keywords, extracted_text,
+                     content_analyzed_at, deep_enriched_at, drive_file_id, drive_modified_at)
+                VALUES %s
+            """, inserts, template="""(%s, %s, %s, 'Google Drive', %s, %s, %s,
+                     %s, %s, %s::jsonb, %s,
+                     %s, %s, %s, %s::timestamptz)""")
+    conn.commit()
+
+
+def insert_as_update(match_id, row: tuple) -> tuple:
+    """Turn an insert row from process_file into an update row for an existing record."""
+    (_, _, _, _, _, _, enhanced_summary, auto_tags, keywords_json, extracted_text, _, enriched_at,
+     drive_file_id, drive_modified_at) = row
+    return (
+        str(match_id),
+        extracted_text,
+        enhanced_summary or None,
+        auto_tags or None,
+        keywords_json if keywords_json != '[]' else None,
+        enriched_at,
+        drive_file_id,
+        drive_modified_at,
+    )
+
+
 def process_file(
     conn,
     service,
@@ -403,9 +583,15 @@ def process_file(
     import_new: bool = False,
     enrich: bool = False,
     dry_run: bool = False,
+    force: bool = False,
     verbose: bool = False,
-) -> str:
-    """Process a single Google Drive file. Returns: 'matched', 'imported', 'skipped', or 'error'."""
+) -> Tuple[str, Optional[Tuple[str, tuple]]]:
+    """Process a single Google Drive file.
+
+    Returns (result, write): result is 'matched', 'imported', 'unchanged',
+    'skipped', or 'error'; write is ('update', row) or ('insert', row) for flush_writes, or
+    None when nothing needs writing.
+    """
     name = file_info['name']
     file_type = file_info.get('file_type', 'unknown')
     drive_url = file_info.get('webViewLink', '')
@@ -416,13 +602,23 @@ def process_file(
         match = find_matching_content(conn, name, drive_url)
         if match:
             print(f"    [DRY RUN] Would update: \"{match['title'][:50]}\"")
-            return 'matched'
+            return 'matched', None
         elif import_new:
             print(f"    [DRY RUN] Would import as new record")
-            return 'imported'
+            return 'imported', None
         else:
             print(f"    [DRY RUN] No match found (use --import-new to create)")
-            return 'skipped'
+            return 'skipped', None
+
+    # Match first, so files unchanged since their last import skip the
+    # download, extraction and AI call
+    match = find_matching_content(conn, name, drive_url)
+    # End the read transaction; the download, parse and AI call below can take
+    # a while, and writes go through the main thread's connection
+    conn.rollback()
+    if match and not force and is_unchanged_since_import(file_info, match):
+        print("    - Unchanged since last import (use --force to reprocess)")
+        return 'unchanged', None
 
     # Extract content
     if verbose:
@@ -431,7 +627,7 @@ def process_file(
 
     if not extracted_text or len(extracted_text) < 50:
         print(f"    - No extractable content")
-        return 'error'
+        return 'error', None
 
     if verbose:
         print(f"    Extracted {len(extracted_text)} chars")
@@ -443,10 +639,6 @@ def process_file(
         if verbose:
             print(f"    Enriching with AI ({ENRICHMENT_MODEL})...")
         ai_data = enrich_with_ai(openai_client, name, content_type, extracted_text)
-        time.sleep(REQUEST_DELAY)
-
-    # Try to match existing record
-    match = find_matching_content(conn, name, drive_url)
 
     if match:
         # Update existing record
@@ -468,32 +660,23 @@ def process_file(
                     })
             update_fields['keywords'] = json.dumps(validated)
 
-        # Build dynamic UPDATE
-        set_clauses = []
-        values = []
-        for field, value in update_fields.items():
-            if field == 'keywords':
-                set_clauses.append(f"{field} = %s::jsonb")
-            else:
-                set_clauses.append(f"{field} = %s")
-            values.append(value)
-        set_clauses.append("deep_enriched_at = %s")
-        values.append(datetime.utcnow())
-        values.append(match['id'])
-
-        with conn.cursor() as cur:
-            cur.execute(
-                f"UPDATE marketing_content SET {', '.join(set_clauses)} WHERE id = %s",
-                values
-            )
-        conn.commit()
+        # Fields the AI didn't produce stay NULL and keep their current value
         print(f"    + Updated: \"{match['title'][:50]}\"")
-        return 'matched'
+        return 'matched', ('update', (
+            str(match['id']),
+            update_fields['extracted_text'],
+            update_fields.get('enhanced_summary'),
+            update_fields.get('auto_tags'),
+            update_fields.get('keywords'),
+            datetime.utcnow(),
+            file_info['id'],
+            drive_modified_time(file_info),
+        ))
 
     elif import_new:
         # Insert new record
         content_type = detect_content_type_from_name(name)
-        clean_title = re.sub(r'\.(pdf|docx|pptx|xlsx)$', '', name, flags=re.IGNORECASE).strip()
+        clean_title = _EXT_RE.sub('', name).strip()
 
         enhanced_summary = ai_data.get('enhanced_summary', '')
         auto_tags = ai_data.get('auto_tags', [])
@@ -512,37 +695,39 @@ def process_file(
             keywords_json = json.dumps(validated)
         state = ai_data.get('state', 'National')
 
-        with conn.cursor() as cur:
-            cur.execute("""
-                INSERT INTO marketing_content
-                    (type, title, live_link, platform, summary, state, tags,
-                     enhanced_summary, auto_tags, keywords, extracted_text,
-                     content_analyzed_at, deep_enriched_at)
-                VALUES
-                    (%s, %s, %s, 'Google Drive', %s, %s, %s,
-                     %s, %s, %s::jsonb, %s,
-                     %s, %s)
-            """, (
-                content_type,
-                clean_title,
-                drive_url,
-                enhanced_summary or f"Content imported from Google Drive: {clean_title}",
-                state if state and len(state) == 2 else None,
-                auto_tags,
-                enhanced_summary,
-                auto_tags,
-                keywords_json,
-                extracted_text[:5000],
-                datetime.utcnow(),
-                datetime.utcnow(),
-            ))
-        conn.commit()
         print(f"    + Imported as new [{content_type}]: \"{clean_title[:50]}\"")
-        return 'imported'
+        return 'imported', ('insert', (
+            content_type,
+            clean_title,
+            drive_url,
+            enhanced_summary or f"Content imported from Google Drive: {clean_title}",
+            state if state and len(state) == 2 else None,
+            auto_tags,
+            enhanced_summary,
+            auto_tags,
+            keywords_json,
+            extracted_text[:5000],
+            datetime.utcnow(),
+            datetime.utcnow(),
+            file_info['id'],
+            drive_modified_time(file_info),
+        ))
 
     else:
         print(f"    - No match (use --import-new to create)")
-        return 'skipped'
+        return 'skipped', None
+
+
+def process_file_worker(file_info: Dict, **options) -> Tuple[str, Optional[Tuple[str, tuple]]]:
+    """Run process_file on this thread's Drive client and a pooled connection."""
+    conn = get_db_connection()
+    try:
+        return process_file(conn=conn, service=get_drive_service(), file_info=file_info, **options)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        return_db_connection(conn)
 
 
 def main():
@@ -556,7 +741,10 @@ def main():
     parser.add_argument('--enrich', action='store_true',
                         help='Run AI enrichment on imported/updated content')
     parser.add_argument('--limit', type=int, help='Max files to process')
+    parser.add_argument('--workers', type=int, default=8, help='Files processed in parallel (default: 8)')
     parser.add_argument('--dry-run', action='store_true', help='Preview without making changes')
+    parser.add_argument('--force', action='store_true',
+                        help='Reprocess files even if unchanged since their last import')
     parser.add_argument('-v', '--verbose', action='store_true', help='Verbose output')
     args = parser.parse_args()
 
@@ -582,7 +770,8 @@ def main():
 
     # Connect to database
     print("Connecting to database...")
-    conn = get_db_connection()
+    # One connection per worker, plus one for the main thread's batched writes
+    init_db_pool(min_conn=1, max_conn=args.workers + 1)
     print("  Connected")
 
     # OpenAI client (optional)
@@ -601,32 +790,110 @@ def main():
 
     if not files:
         print("\nNo supported files found in the specified folder.")
-        conn.close()
+        db_pool.closeall()
         return
 
     if args.limit:
         files = files[:args.limit]
         print(f"  Processing first {len(files)} files")
 
-    # Process files
-    print(f"\nProcessing {len(files)} files...")
-    counts = {'matched': 0, 'imported': 0, 'skipped': 0, 'error': 0}
-
-    for i, file_info in enumerate(files):
-        if args.verbose:
-            print(f"\n[{i+1}/{len(files)}]", end='')
-
-        result = process_file(
-            conn=conn,
-            service=service,
-            openai_client=openai_client,
-            file_info=file_info,
-            import_new=args.import_new,
-            enrich=args.enrich,
-            dry_run=args.dry_run,
-            verbose=args.verbose,
-        )
-        counts[result] = counts.get(result, 0) + 1
+    # Process files (I/O-bound: Drive downloads, OpenAI and Postgres round-trips)
+    print(f"\nProcessing {len(files)} files with {args.workers} workers...")
+    counts = {'matched': 0, 'imported': 0, 'unchanged': 0, 'skipped': 0, 'error': 0}
+    pending_updates = []
+    pending_inserts = []
+
+    def flush_pending():
+        conn = get_db_connection()
+        try:
+            flush_writes(conn, pending_updates, pending_inserts)
+        except psycopg2.Error as e:
+            conn.rollback()
+            print(f"\n  ✗ Failed to write {len(pending_updates) + len(pending_inserts)} records: {e}")
+            # Those files were counted when they finished; recount them as errors
+            counts['matched'] -= len(pending_updates)
+            counts['imported'] -= len(pending_inserts)
+            counts['error'] += len(pending_updates) + len(pending_inserts)
+        finally:
+            return_db_connection(conn)
+        pending_updates.clear()
+        pending_inserts.clear()
+
+    # Drive URLs and lowercased titles inserted this run. Workers can't see
+    # buffered inserts, so a second copy of a file (same name, another folder)
+    # would miss and be inserted again; it updates the first copy instead.
+    inserted_keys = set()
+
+    def queue_insert(row):
+        clean_title, drive_url = row[1], row[2]
+        keys = {('url', drive_url)} if drive_url else set()
+        if len(clean_title) > 5:
+            keys.add(('title', clean_title.lower()))
+        if not keys & inserted_keys:
+            inserted_keys.update(keys)
+            pending_inserts.append(row)
+            return 'imported'
+
+        # Make the earlier copy visible, then match it like any existing record
+        if pending_updates or pending_inserts:
+            flush_pending()
+        conn = get_db_connection()
+        try:
+            match = find_matching_content(conn, clean_title, drive_url)
+            conn.rollback()
+        finally:
+            return_db_connection(conn)
+        if not match:
+            # The earlier copy failed to write; insert this one instead
+            pending_inserts.append(row)
+            return 'imported'
+        print(f"\n  + Duplicate of a file imported this run, updating: \"{match['title'][:50]}\"")
+        pending_updates.append(insert_as_update(match['id'], row))
+        return 'matched'
+
+    if not args.dry_run:
+        init_parse_pool()
+
+    # Worker threads download and call the APIs; parsing goes to the process
+    # pool, so downloads overlap with other files' extraction
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = {
+            executor.submit(
+                process_file_worker,
+                file_info,
+                openai_client=openai_client,
+                import_new=args.import_new,
+                enrich=args.enrich,
+                dry_run=args.dry_run,
+                force=args.force,
+                verbose=args.verbose,
+            ): file_info
+            for file_info in files
+        }
+
+        for done, future in enumerate(as_completed(futures), start=1):
+            try:
+                result, write = future.result()
+            except Exception as e:
+                print(f"\n  Worker error on {futures[future]['name'][:60]}: {e}")
+                result, write = 'error', None
+            if write:
+                kind, row = write
+                if kind == 'insert':
+                    result = queue_insert(row)
+                else:
+                    pending_updates.append(row)
+            counts[result] = counts.get(result, 0) + 1
+            if len(pending_updates) + len(pending_inserts) >= FLUSH_EVERY:
+                flush_pending()
+            if args.verbose:
+                print(f"\n[{done}/{len(files)} done]")
+
+    if pending_updates or pending_inserts:
+        flush_pending()
+
+    if parse_pool:
+        parse_pool.shutdown()
 
     # Summary
     print("\n")
@@ -636,13 +903,14 @@ def main():
     print(f"  Total files:   {len(files)}")
     print(f"  Matched:       {counts['matched']} (updated existing records)")
     print(f"  Imported:      {counts['imported']} (new records created)")
+    print(f"  Unchanged:     {counts['unchanged']} (not modified since last import)")
     print(f"  Skipped:       {counts['skipped']} (no match, --import-new not set)")
     print(f"  Errors:        {counts['error']}")
 
     if args.dry_run:
         print("\n  [DRY RUN] No changes were made.")
 
-    conn.close()
+    db_pool.closeall()
     print("\nDone!")
 
 
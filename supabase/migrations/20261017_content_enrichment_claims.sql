@@ -0,0 +1,23 @@
+-- Enrichment claims
+-- enrich_video_states.py / enrich_video_tags.py claim the videos they select
+-- (FOR UPDATE SKIP LOCKED + a row here), so several runs of the same script can
+-- work through the backlog in parallel without processing a video twice.
+-- Each run deletes its own claims (and expired ones) when it ends, failed or
+-- not. Claims older than the scripts' CLAIM_TIMEOUT_MINUTES are ignored, so a
+-- killed run's videos are picked up again later.
+-- The scripts expect this migration to be applied; they don't create the
+-- table themselves.
+
+CREATE TABLE IF NOT EXISTS content_enrichment_claims (
+  content_id UUID NOT NULL,
+  job TEXT NOT NULL,           -- 'video_states' or 'video_tags'
+  claimed_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  PRIMARY KEY (content_id, job)
+);
+
+-- Script-only table: service role (DATABASE_URL) bypasses RLS, no public access
+ALTER TABLE content_enrichment_claims ENABLE ROW LEVEL SECURITY;
+
+-- Comments
+COMMENT ON TABLE content_enrichment_claims IS 'Which enrichment job last claimed a marketing_content row, for parallel script runs';
+COMMENT ON COLUMN content_enrichment_claims.claimed_at IS 'Claim time; other runs of the job skip the row until the claim expires';
@@ -0,0 +1,21 @@
+-- AI tag/summary response cache
+-- Stores gpt-4o-mini enrichment responses keyed by a hash of the exact prompt
+-- (model + messages, which include title, type, and extracted text), so reruns
+-- of enrich_pdf_text.py / enrich_hubspot_pdfs.py skip the API for unchanged PDFs.
+-- The scripts expect this migration to be applied; they don't create the
+-- table themselves.
+
+CREATE TABLE IF NOT EXISTS content_tags_cache (
+  prompt_hash TEXT PRIMARY KEY,
+  model TEXT NOT NULL,
+  response JSONB NOT NULL,
+  created_at TIMESTAMP DEFAULT NOW()
+);
+
+-- Script-only table: service role (DATABASE_URL) bypasses RLS, no public access
+ALTER TABLE content_tags_cache ENABLE ROW LEVEL SECURITY;
+
+-- Comments
+COMMENT ON TABLE content_tags_cache IS 'Cached OpenAI enrichment responses keyed by sha256 of model + prompt messages';
+COMMENT ON COLUMN content_tags_cache.prompt_hash IS 'sha256 hex of the JSON-serialized {model, messages} request';
+COMMENT ON COLUMN content_tags_cache.response IS 'Parsed JSON object returned by the model';
@@ -0,0 +1,14 @@
+-- Google Drive import marker for marketing_content
+-- import_google_drive.py records which Drive file (and which revision of it)
+-- it last wrote into a record, and skips that file on reruns until it is
+-- modified again (--force overrides). deep_enriched_at can't serve this:
+-- enrich_deep.py and enrich_customer_stories.py write it too.
+-- Only import_google_drive.py writes these columns.
+
+ALTER TABLE marketing_content
+ADD COLUMN IF NOT EXISTS drive_file_id TEXT,
+ADD COLUMN IF NOT EXISTS drive_modified_at TIMESTAMPTZ;
+
+-- Comments
+COMMENT ON COLUMN marketing_content.drive_file_id IS 'Google Drive file id last imported into this record (import_google_drive.py)';
+COMMENT ON COLUMN marketing_content.drive_modified_at IS 'Drive modifiedTime of the file revision last imported (import_google_drive.py)';
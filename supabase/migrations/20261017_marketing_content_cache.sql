@@ -0,0 +1,31 @@
+-- Video enrichment response cache
+-- Stores gpt-4o-mini analyses from enrich_video_states.py / enrich_video_tags.py
+-- keyed by a hash of the normalized prompt input, so reruns skip the API for
+-- videos whose metadata hasn't changed. enrich_video_tags.py also stores an
+-- embedding of the input and reuses the answer for near-identical titles
+-- (series, reposts, A/B variants).
+-- The scripts expect this migration to be applied (or run with --no-cache);
+-- they don't create the table or the vector extension themselves.
+
+CREATE EXTENSION IF NOT EXISTS vector;
+
+CREATE TABLE IF NOT EXISTS marketing_content_cache (
+  input_hash TEXT PRIMARY KEY,
+  kind TEXT NOT NULL,          -- 'video_states:<prompt hash>' or 'video_tags:<prompt hash>'
+  embedding VECTOR(1536),      -- text-embedding-3-small; NULL for exact-match-only entries
+  response JSONB NOT NULL,
+  created_at TIMESTAMP DEFAULT NOW()
+);
+
+-- Nearest-neighbor lookup for the semantic cache
+CREATE INDEX IF NOT EXISTS idx_marketing_content_cache_embedding
+  ON marketing_content_cache USING hnsw (embedding vector_cosine_ops);
+
+-- Script-only table: service role (DATABASE_URL) bypasses RLS, no public access
+ALTER TABLE marketing_content_cache ENABLE ROW LEVEL SECURITY;
+
+-- Comments
+COMMENT ON TABLE marketing_content_cache IS 'Cached OpenAI video analyses keyed by sha256 of kind + normalized prompt input';
+COMMENT ON COLUMN marketing_content_cache.input_hash IS 'sha256 hex of kind|normalized input (lowercased, whitespace collapsed)';
+COMMENT ON COLUMN marketing_content_cache.embedding IS 'Input embedding for cosine-distance reuse of near-duplicate titles';
+COMMENT ON COLUMN marketing_content_cache.response IS 'Parsed JSON object returned by the model';
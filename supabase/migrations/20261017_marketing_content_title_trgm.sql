@@ -0,0 +1,11 @@
+-- Index for the import_google_drive.py title lookup
+-- find_matching_content falls back to LOWER(title) ILIKE '%<drive file name>%',
+-- which no btree can serve; a trigram GIN index on the same expression lets
+-- Postgres answer the infix match from the index instead of scanning every
+-- title once per Drive file.
+-- The indexed expression must stay LOWER(title) to match the script's query.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_marketing_content_title_trgm
+  ON marketing_content USING gin (LOWER(title) gin_trgm_ops);
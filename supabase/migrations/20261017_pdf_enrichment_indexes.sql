@@ -0,0 +1,12 @@
+-- Indexes for the enrich_pdf_text.py candidate query
+-- The query filters PDF-linked ebooks/1-pagers by type and short/missing
+-- extracted_text; these let Postgres skip the rest of marketing_content.
+
+-- PDF-linked rows only, searchable by type
+CREATE INDEX IF NOT EXISTS idx_marketing_content_pdf_type
+  ON marketing_content(type)
+  WHERE ungated_link LIKE '%.pdf';
+
+-- Expression index for the LENGTH(extracted_text) < 100 check
+CREATE INDEX IF NOT EXISTS idx_marketing_content_extracted_text_length
+  ON marketing_content(LENGTH(extracted_text));
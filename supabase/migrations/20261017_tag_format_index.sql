@@ -0,0 +1,10 @@
+-- Index for the fix_tag_format.py query
+-- Selects rows whose tags/auto_tags are still PostgreSQL array literals
+-- ({a, "b c"}); a leading-brace LIKE can't use a plain btree, so this partial
+-- index holds just those rows in title order. Once the fix has run it is
+-- empty, and repeat runs find nothing without scanning marketing_content.
+-- The WHERE clause must stay in sync with AFFECTED_FILTER in the script.
+
+CREATE INDEX IF NOT EXISTS idx_marketing_content_array_tags
+  ON marketing_content(title)
+  WHERE tags LIKE '{%}' OR auto_tags LIKE '{%}';
@@ -0,0 +1,18 @@
+-- Indexes for the enrich_video_states.py / enrich_video_tags.py candidate queries
+-- Both select the videos still pending enrichment, newest first; these partial
+-- indexes hold only those rows in last_updated order, so the planner reads the
+-- pending subset directly instead of scanning and sorting marketing_content.
+-- The WHERE clauses must stay in sync with the scripts' queries.
+
+-- Videos missing a state (enrich_video_states.py without --all)
+CREATE INDEX IF NOT EXISTS idx_marketing_content_video_state_pending
+  ON marketing_content(last_updated DESC)
+  WHERE type IN ('Video', 'Video Clip')
+    AND (state IS NULL OR state = '');
+
+-- Title-only videos with little or no auto-tagging (enrich_video_tags.py)
+CREATE INDEX IF NOT EXISTS idx_marketing_content_video_tag_pending
+  ON marketing_content(last_updated DESC)
+  WHERE type IN ('Video', 'Video Clip')
+    AND (extracted_text IS NULL OR LENGTH(extracted_text) < 100)
+    AND (auto_tags IS NULL OR LENGTH(auto_tags) < 10);
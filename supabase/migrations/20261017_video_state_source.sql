@@ -0,0 +1,7 @@
+-- Record how enrich_video_states.py determined a video's state
+-- 'pattern' = district/city/state-name match on title, tags, and summary
+-- 'ai'      = inferred by gpt-4o-mini when pattern matching found nothing
+
+ALTER TABLE marketing_content ADD COLUMN IF NOT EXISTS state_source TEXT;
+
+COMMENT ON COLUMN marketing_content.state_source IS 'How state was set by enrich_video_states.py: pattern or ai';